@@ -1,4 +1,3 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -8,27 +7,73 @@ import time
 import pandas as pd
 import os
 import re
+import sys
+import queue
+import argparse
+import threading
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from collections import deque
+
+# === Shared Helpers ===
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from common.cli import add_common_arguments
+from common.extractors import extract_cards
+from common.browser import start_driver, release_driver
+from common.recycle import DriverRecycler, session_alive
+from common.checkpoint import CategoryCheckpoint
+from common.fingerprint import FingerprintStore, listing_fingerprint
+from common.workbook import write_workbook
+from common.snapshots import SnapshotParser, save_in_order
+from common.archive import SnapshotArchive
+from common.blocking import enable_network_log, setup_blocking, scrape_with_blocking
+from common.http_fetch import session_from_driver, fetch_all, with_query
+from common.deadline import start_category_deadline, deadline_expired, mark_incomplete
+from common.politeness import polite_request, report_empty_page
+from common.html_parsers import parse_document, btech_cards
+from common.structured import structured_offers, apply_structured
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Btech category scraper")
+add_common_arguments(parser)
+parser.add_argument("--workers", type=int, default=3,
+                    help="Number of Chrome drivers scraping categories in parallel (default: 3)")
+parser.add_argument("--load", choices=["click", "pages"], default="click",
+                    help="'click' presses Load More until done, 'pages' downloads the ?p=N listing pages in parallel")
+parser.add_argument("--http-workers", type=int, default=8,
+                    help="Concurrent page downloads per category in --load pages mode (default: 8)")
+parser.add_argument("--full", action="store_true",
+                    help="Scrape every category even if its listing fingerprint matches the last run")
+args = parser.parse_args()
+num_workers = max(1, args.workers)
 
 # === Chrome Setup ===
-options = Options()
-# options.add_argument('--headless=new')  # Uncomment for headless mode
-options.add_argument('--disable-gpu')
-options.add_argument('--window-size=1920,1080')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_experimental_option('excludeSwitches', ['enable-automation'])
-options.add_experimental_option('useAutomationExtension', False)
-driver = webdriver.Chrome(options=options)
-driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-    "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-})
-wait = WebDriverWait(driver, 10)
+def create_driver():
+    """Start a Chrome driver with the Btech options and user agent override."""
+    options = Options()
+    # options.add_argument('--headless=new')  # Uncomment for headless mode
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    if args.block_resources or args.check_blocking:
+        enable_network_log(options)
+    driver = start_driver(options, "btech", attach=args.attach,
+                          persistent_profile=args.persistent_profile, cache_mb=args.cache_mb)
+    if args.category_timeout:
+        driver.set_page_load_timeout(args.category_timeout)
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+        "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    })
+    setup_blocking(driver, "btech", args)
+    return driver
+
+def log(msg):
+    """Print with the worker name so interleaved output stays readable."""
+    print(f"[{threading.current_thread().name}] {msg}")
 
 # === Input Excel ===
-input_excel = "btech-targets.xlsx"
+input_excel = args.targets or "btech-targets.xlsx"
 df = pd.read_excel(input_excel, header=1)
 df.columns = df.columns.str.strip()
 df = df.dropna(subset=["Category", "URL"])
@@ -41,64 +86,26 @@ os.makedirs(output_dir, exist_ok=True)
 # === Final Output File (One Workbook) ===
 timestamp = datetime.now().strftime("%Y-%m-%d")
 output_file = os.path.join(output_dir, f"btech-all-categories_{timestamp}.xlsx")
-
-# === Excel Styling Function (Per Sheet) ===
-def style_sheet(ws, category_name, date_str):
-    """Apply consistent styling: black header, centered, URL column width 20, shrink-to-fit."""
-    header_fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    body_font = Font(color="000000")
-    center_align = Alignment(horizontal="center", vertical="center")
-    border = Border(bottom=Side(border_style="thin", color="000000"))
-
-    # Insert and merge header row (Row 1)
-    ws.insert_rows(1)
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=6)
-    merged_cell = ws.cell(row=1, column=1)
-    merged_cell.value = f"Btech {category_name} {date_str}"
-    merged_cell.font = header_font
-    merged_cell.fill = header_fill
-    merged_cell.alignment = center_align
-
-    # Style header row (Row 2)
-    for cell in ws[2]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-
-    # Style body and set column widths
-    for column in ws.columns:
-        col_letter = get_column_letter(column[0].column)
-        header = column[1].value if len(column) > 1 else None
-
-        if header == "Product URL":
-            # Fixed width, left-aligned, shrink to fit
-            ws.column_dimensions[col_letter].width = 20
-            for cell in column[2:]:
-                cell.alignment = Alignment(
-                    horizontal="left",
-                    vertical="center",
-                    wrap_text=False,
-                    shrink_to_fit=True
-                )
-                cell.font = body_font
-                cell.border = border
-        else:
-            # Auto width for other columns
-            max_length = 0
-            for cell in column[2:]:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length + 6
-
-            # Center-align non-URL cells
-            for cell in column[2:]:
-                cell.alignment = center_align
-                cell.font = body_font
-                cell.border = border
+checkpoint = CategoryCheckpoint(output_dir, timestamp, resume=args.resume)
+archive = SnapshotArchive(output_dir, timestamp, enabled=args.archive)
+fingerprints = FingerprintStore(output_dir, timestamp, enabled=not (args.full or args.check_blocking), archive=archive)
+snapshots = SnapshotParser("btech_cards", args.parse_workers, wait=args.check_blocking) if args.extract == "snapshot" else None
+
+# === Excel Styling (Per Sheet) ===
+# Title row "Btech <category> <date>", header colours, URL column width, auto-fit padding
+SHEET_STYLE = {
+    "title": "Btech",
+    "header_color": "000000",
+    "header_font_color": "FFFFFF",
+    "url_width": 20,
+    "width_padding": 6,
+}
 
 # === Helper Functions ===
+def sheet_name(category):
+    """Excel sheet name for a category (also used by tools/replay-snapshots.py)."""
+    return re.sub(r'[^\w\s-]', '_', category)[:31].strip()
+
 def normalize_price(text):
     """Extract integer from price text."""
     if not text:
@@ -122,30 +129,119 @@ def normalize_sku(sku):
     """Remove separators and lowercase."""
     return re.sub(r'[^a-zA-Z0-9]', '', sku).lower() if sku else ""
 
+def price_or_none(text):
+    """normalize_price, but None instead of an error (same as the per-card try/except)."""
+    try:
+        return normalize_price(text)
+    except Exception:
+        return None
+
+def make_row(title, old_price, new_price, product_url):
+    """Build one output row, deriving the product code from the title."""
+    product_code = extract_sku(title)
+    return {
+        "Item Name": title,
+        "Old Price": old_price,
+        "New Price": new_price,
+        "Product Code": product_code,
+        "Normalized Code": normalize_sku(product_code),
+        "Product URL": product_url
+    }
+
+def rows_from_cards(cards):
+    """Turn raw card dicts (JS or HTML parser) into rows, skipping cards without a title."""
+    data = []
+    for card in cards:
+        title = (card["title"] or "").strip()
+        if not title or not card["url"]:
+            continue
+        data.append(make_row(
+            title,
+            price_or_none(card["old"]),
+            price_or_none(card["special"]),
+            card["url"].strip()
+        ))
+    return data
+
+def parse_cards_js(driver):
+    """Parse every listing card from one execute_script call."""
+    return rows_from_cards(extract_cards(driver, "btech"))
+
+def parse_cards_structured(driver):
+    """Card rows priced from the page's embedded product data (JSON-LD, Magento price attributes) where present."""
+    doc = parse_document(driver.page_source)
+    data = rows_from_cards(btech_cards(doc, driver.current_url))
+    found = apply_structured(data, structured_offers(doc, driver.current_url), normalize_sku)
+    log(f"✅ Parsed {len(data)} products, {found} priced from embedded data.")
+    return data
+
+# === Direct Page Fetching ===
+def fetch_listing_pages(driver, category, url, expected_total):
+    """
+    Parse page 1 from the browser, download ?p=2..N with the browser's cookies in parallel,
+    and merge everything deduplicated by product URL.
+    """
+    html = driver.page_source
+    archive.store(category, 1, html, driver.current_url)
+    doc = parse_document(html)
+    cards = btech_cards(doc, driver.current_url)
+    offers = structured_offers(doc, driver.current_url) if args.extract == "structured" else {}
+    per_page = len(cards) or 30
+    total_pages = -(-expected_total // per_page)
+    log(f"📄 {per_page} products on page 1 → fetching {total_pages - 1} more pages directly")
+
+    session = session_from_driver(driver, args.http_workers)
+    page_urls = [with_query(url, p=page) for page in range(2, total_pages + 1)]
+    try:
+        for page, (page_url, html, error) in enumerate(fetch_all(session, page_urls, args.http_workers), start=2):
+            if html is None:
+                log(f"⚠️ Could not download page {page}: {error}")
+                mark_incomplete()
+                continue
+            archive.store(category, page, html, page_url)
+            doc = parse_document(html)
+            page_cards = btech_cards(doc, page_url)
+            if args.extract == "structured":
+                offers.update(structured_offers(doc, page_url))
+            if not page_cards:
+                report_empty_page(page_url)
+            cards.extend(page_cards)
+    finally:
+        session.close()
+
+    data, seen_urls = [], set()
+    for row in rows_from_cards(cards):
+        if row["Product URL"] in seen_urls:
+            continue
+        seen_urls.add(row["Product URL"])
+        data.append(row)
+    log(f"✅ Merged {len(data)} unique products from {total_pages} pages")
+    if args.extract == "structured":
+        log(f"✅ {apply_structured(data, offers, normalize_sku)} of them priced from embedded data")
+    return data
+
 # === Extract Total Expected Products ===
-def extract_total_expected_products(driver):
+def extract_total_expected_products(driver, wait):
     """Extract total from #product-search-item-count."""
     try:
         el = wait.until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "span#product-search-item-count"))
         )
         text = el.text.strip()
-        print(f"🔍 Found product count: {text}")
+        log(f"🔍 Found product count: {text}")
         if text.isdigit():
             return int(text)
         numbers = re.findall(r'\d+', text)
         return int(numbers[0]) if numbers else None
     except Exception as e:
-        print(f"❌ Could not find product count: {str(e)}")
+        log(f"❌ Could not find product count: {str(e)}")
         return None
 
-# === Start Scraping ===
-print("🚀 Starting Btech Scraper")
-data_by_category = {}
-
-for category, url in category_links:
-    print(f"\n➡️ Scraping Category: {category}")
-    print(f"🔗 URL: {url}")
+# === Scrape One Category ===
+def scrape_category(driver, wait, category, url):
+    """Load every product of one category and return its rows (empty list on failure)."""
+    log(f"➡️ Scraping Category: {category}")
+    log(f"🔗 URL: {url}")
     driver.get(url)
     time.sleep(3)
 
@@ -153,16 +249,26 @@ for category, url in category_links:
     try:
         wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.products.wrapper.grid.products-grid")))
     except TimeoutException:
-        print("❌ Timeout: Product container not found. Skipping.")
-        continue
+        log(f"❌ Timeout: Product container not found. Skipping '{category}'.")
+        return []
 
     # Get expected total
-    expected_total = extract_total_expected_products(driver)
+    expected_total = extract_total_expected_products(driver, wait)
     if not expected_total:
-        print("⚠️ Could not determine product count. Skipping category.")
-        continue
+        log(f"⚠️ Could not determine product count. Skipping '{category}'.")
+        return []
     max_scrape_limit = expected_total + 2
-    print(f"📊 Expected: {expected_total} | Max: {max_scrape_limit}")
+    log(f"📊 Expected: {expected_total} | Max: {max_scrape_limit}")
+
+    # Reuse the last run's rows if the count and first page are unchanged
+    fingerprint = listing_fingerprint(expected_total, parse_cards_js(driver))
+    previous = fingerprints.previous_rows(category, fingerprint, expected_total)
+    if previous is not None:
+        log(f"♻️ Listing unchanged since the last run, reusing its {len(previous)} products")
+        return previous
+
+    if args.load == "pages":
+        return fetch_listing_pages(driver, category, url, expected_total)
 
     # Click "Load More" safely
     previous_count = 0
@@ -170,13 +276,15 @@ for category, url in category_links:
     max_clicks = (expected_total // 30) + 5  # 30 per click + margin
 
     while click_count < max_clicks:
+        if deadline_expired():
+            break
         time.sleep(2)
         current_cards = driver.find_elements(By.CSS_SELECTOR, "div.plpContentWrapper")
         current_count = len(current_cards)
-        print(f"🔄 Loaded {current_count} products...")
+        log(f"🔄 Loaded {current_count} products...")
 
         if current_count >= max_scrape_limit:
-            print(f"✅ Reached limit: {current_count}")
+            log(f"✅ Reached limit: {current_count}")
             break
 
         if current_count == previous_count:
@@ -189,24 +297,39 @@ for category, url in category_links:
         try:
             load_more = driver.find_element(By.CSS_SELECTOR, "div.amscroll-load-button")
             if "عرض" in load_more.text or "المزيد" in load_more.text:
-                print(f"➡️ Clicking 'Load More' ({click_count + 1}/{max_clicks})...")
+                log(f"➡️ Clicking 'Load More' ({click_count + 1}/{max_clicks})...")
                 try:
                     load_more.click()
                 except:
                     driver.execute_script("arguments[0].click();", load_more)
                 time.sleep(3)
         except:
-            print("🔚 'Load More' not found.")
+            log("🔚 'Load More' not found.")
             break
 
     # Final product list
     product_cards = driver.find_elements(By.CSS_SELECTOR, "div.plpContentWrapper")
-    print(f"✅ Final count: {len(product_cards)}")
+    log(f"✅ Final count: {len(product_cards)}")
+
+    # Keep the loaded page for offline re-parsing (--archive)
+    archive.store_page(category, driver)
 
     # === Parse Products ===
+    if args.extract == "snapshot":
+        log("📸 Queued the loaded listing for parsing")
+        return snapshots.rows([snapshots.submit(driver)], rows_from_cards)
+
+    if args.extract == "structured":
+        return parse_cards_structured(driver)
+
+    if args.extract == "js":
+        data = parse_cards_js(driver)
+        log(f"Parsed {len(data)} products in one script call")
+        return data
+
     data = []
     wrappers = driver.find_elements(By.CSS_SELECTOR, "a.listingWrapperSection")
-    print(f"Found {len(wrappers)} products to parse")
+    log(f"Found {len(wrappers)} products to parse")
 
     for wrapper in wrappers:
         try:
@@ -233,48 +356,124 @@ for category, url in category_links:
             except:
                 old_price = None
 
-            # SKU Extraction
-            product_code = extract_sku(title)
-            normalized_code = normalize_sku(product_code)
-
-            data.append({
-                "Item Name": title,
-                "Old Price": old_price,
-                "New Price": new_price,
-                "Product Code": product_code,
-                "Normalized Code": normalized_code,
-                "Product URL": product_url
-            })
+            data.append(make_row(title, old_price, new_price, product_url))
         except Exception as e:
-            print(f"❌ Skipped product: {e}")
+            log(f"❌ Skipped product: {e}")
             continue
 
-    # Save data for this category
-    if data:
-        data_by_category[category] = data
-        print(f"📌 Collected {len(data)} products for '{category}'")
+    return data
+
+# === Driver Pool Worker ===
+CRASH_RETRIES = 1  # times a category is requeued after Chrome crashed on it
+
+def scrape_worker(task_queue, results, results_lock, failed_workers):
+    """Own one Chrome driver and scrape categories from the shared queue until it is empty."""
+    try:
+        driver = create_driver()
+    except Exception as e:
+        log(f"❌ Could not start Chrome: {e}")
+        failed_workers.append(threading.current_thread().name)
+        return
+    wait = WebDriverWait(driver, 10)
+    recycler = DriverRecycler(create_driver, args.recycle_every, args.max_heap_mb, args.max_browser_mb, log=log)
+    pending = deque()  # ((index, category), rows or PendingRows, partial) not saved yet
+
+    def save_category(task, data, partial):
+        index, category = task
+        if data:
+            checkpoint.save(category, data, partial=partial)
+            if not partial:
+                fingerprints.record(category, len(data))
+        with results_lock:
+            results[index] = len(data)  # row counts only; the rows are in the checkpoint
+        if data:
+            log(f"📌 Collected {len(data)} products for '{category}'{' (partial)' if partial else ''}")
+        else:
+            log(f"⚠️ No products collected for '{category}'")
+
+    try:
+        while True:
+            try:
+                index, category, url, attempt = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            deadline = start_category_deadline(args.category_timeout)
+            try:
+                # Category loads share Btech's browser budget, so the number of drivers loading at once adapts too
+                with polite_request(url, kind="browser", timed=False) as slot:
+                    data = scrape_with_blocking(
+                        driver, "btech", args, lambda: scrape_category(driver, wait, category, url), log=log
+                    )
+                    if not data:
+                        slot.fail()
+            except Exception as e:
+                log(f"❌ Category '{category}' failed: {e}")
+                data = []
+                if not session_alive(driver):
+                    # A dead Chrome would fail every remaining category within seconds
+                    requeued = attempt < CRASH_RETRIES
+                    if requeued:
+                        log(f"🔁 Chrome crashed; putting '{category}' back on the queue")
+                        task_queue.put((index, category, url, attempt + 1))
+                    try:
+                        driver = recycler.replace(driver)
+                    except Exception as e:
+                        log(f"❌ Could not restart Chrome, stopping this worker: {e}")
+                        driver = None
+                        break
+                    wait = WebDriverWait(driver, 10)
+                    if requeued:
+                        continue
+            # With --extract snapshot the driver moves on while the pool parses this category
+            pending.append(((index, category), data, deadline.partial))
+            save_in_order(pending, save_category)
+            driver = recycler.check(driver)
+            wait = WebDriverWait(driver, 10)
+    finally:
+        if driver:
+            release_driver(driver)
+        save_in_order(pending, save_category, flush=True)
+
+# === Start Scraping ===
+print(f"🚀 Starting Btech Scraper ({num_workers} drivers)")
+task_queue = queue.Queue()
+results = {}
+for index, (category, url) in enumerate(category_links):
+    if checkpoint.has(category):
+        results[index] = checkpoint.count(category)
+        print(f"⏭️ Resumed {results[index]} products for '{category}' from checkpoint")
     else:
-        print(f"⚠️ No products collected for '{category}'")
+        task_queue.put((index, category, url, 0))
+
+results_lock = threading.Lock()
+failed_workers = []
+workers = [
+    threading.Thread(
+        target=scrape_worker,
+        args=(task_queue, results, results_lock, failed_workers),
+        name=f"driver-{n + 1}",
+    )
+    for n in range(min(num_workers, task_queue.qsize()))
+]
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+if snapshots:
+    snapshots.shutdown()
+
+# Keep the sheet order of the targets file regardless of finish order
+saved_categories = [category for index, (category, url) in enumerate(category_links) if results.get(index)]
 
 # === Save All Data to Single Workbook ===
-if data_by_category:
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        for category, data in data_by_category.items():
-            safe_sheet_name = re.sub(r'[^\w\s-]', '_', category)[:31].strip()
-            df_out = pd.DataFrame(data)[[
-                "Item Name",
-                "Old Price",
-                "New Price",
-                "Product Code",
-                "Normalized Code",
-                "Product URL"
-            ]]
-            df_out.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-            style_sheet(writer.sheets[safe_sheet_name], category, datetime.now().strftime("%y-%m-%d"))
+if saved_categories:
+    # Clean sheet names (remove invalid chars, limit to 31)
+    sheets = [(category, sheet_name(category)) for category in saved_categories]
+    write_workbook(output_file, sheets, checkpoint, SHEET_STYLE, datetime.now().strftime("%y-%m-%d"))
     print(f"📁 Saved all categories to: {output_file}")
 else:
     print("⚠️ No data collected across all categories.")
 
-# === Cleanup ===
-driver.quit()
 print("🏁 Btech scraping completed.")
+if workers and len(failed_workers) == len(workers):
+    sys.exit(1)
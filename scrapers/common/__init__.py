@@ -0,0 +1 @@
+"""Helpers shared by the retailer scrapers (imported after adding scrapers/ to sys.path)."""
@@ -0,0 +1,103 @@
+"""
+Content-addressed archive of loaded listing pages, for re-parsing without a browser.
+
+With --archive each listing page the browser has finished loading is stored as
+<output_dir>/.snapshots/objects/<sha256[:2]>/<sha256>.html.gz. The name is the hash
+of the HTML, so a page that hasn't changed is stored once however many runs and
+dates see it. <output_dir>/.snapshots/<date>.jsonl lists what each run stored:
+category, page number, URL, blob hash and the parser options; a category reused from
+an earlier run (common.fingerprint) is listed again with that run's blobs. tools/replay-snapshots.py
+re-runs extraction over any date's snapshots with the lxml parsers of
+common.html_parsers and the scraper's current rows_from_cards / extract_sku.
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+
+# Card parser in common.html_parsers for each retailer's listing pages
+CARD_PARSERS = {
+    "2b": "twob_cards",
+    "btech": "btech_cards",
+    "raneen": "raneen_cards",
+    "raya": "raya_cards",
+    "rizkalla": "rizkalla_cards",
+}
+
+def blob_path(output_dir, digest):
+    return os.path.join(output_dir, ".snapshots", "objects", digest[:2], f"{digest}.html.gz")
+
+def manifest_path(output_dir, date_str):
+    return os.path.join(output_dir, ".snapshots", f"{date_str}.jsonl")
+
+class SnapshotArchive:
+    def __init__(self, output_dir, date_str, enabled=False):
+        self.output_dir = output_dir
+        self.manifest = manifest_path(output_dir, date_str)
+        self.enabled = enabled
+        self.run = int(time.time())  # a category scraped again later in the day replaces this run's pages
+        self._lock = threading.Lock()  # Btech workers store from several threads
+
+    def store(self, category, page, html, url, **options):
+        """Store one page's HTML (once per distinct content) and list it in today's manifest."""
+        if not self.enabled:
+            return
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = blob_path(self.output_dir, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        entry = {"run": self.run, "category": category, "page": page, "url": url, "sha256": digest, "options": options}
+        with self._lock:
+            with open(self.manifest, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def store_page(self, category, driver, page=1, **options):
+        """Store the page the driver has loaded."""
+        if self.enabled:
+            self.store(category, page, driver.page_source, driver.current_url, **options)
+
+    def reuse(self, category, date_str):
+        """List the pages archived for category on date_str as today's, for a category whose rows were reused."""
+        if not self.enabled:
+            return
+        try:
+            entries = read_manifest(self.output_dir, date_str).get(category, [])
+        except FileNotFoundError:
+            entries = []
+        if not entries:
+            print(f"⚠️ '{category}' was reused from {date_str}, which archived no pages of it")
+            return
+        with self._lock:
+            with open(self.manifest, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(dict(entry, run=self.run), ensure_ascii=False) + "\n")
+
+def load_snapshot(output_dir, digest):
+    with gzip.open(blob_path(output_dir, digest), "rb") as f:
+        return f.read().decode("utf-8")
+
+def read_manifest(output_dir, date_str):
+    """
+    The pages of each category from the last run that archived it, in page order, as
+    {category: [entry, ...]} in the order categories were first seen. A page stored
+    twice in that run (e.g. by --check-blocking) keeps its last copy.
+    """
+    latest = {}
+    with open(manifest_path(output_dir, date_str), encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            run, pages = latest.get(entry["category"], (None, {}))
+            if run != entry["run"]:
+                run, pages = entry["run"], {}
+            pages[entry["page"]] = entry
+            latest[entry["category"]] = (run, pages)
+    return {category: [pages[page] for page in sorted(pages)] for category, (run, pages) in latest.items()}
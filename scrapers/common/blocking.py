@@ -0,0 +1,149 @@
+"""
+Per-retailer resource blocking over CDP.
+
+We only read text from product cards, so images, fonts, video and analytics are
+dropped with Network.setBlockedURLs. Stylesheets and scripts are never blocked:
+the grids are rendered by the sites' JS and Selenium's .text depends on CSS
+visibility.
+
+Bytes are measured from Chrome's performance log (Network.loadingFinished /
+Network.loadingFailed events), which has to be switched on in the Options before
+the driver starts (enable_network_log).
+"""
+import json
+
+# === Blocklist Profiles ===
+_MEDIA = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+]
+_TRACKERS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googleadservices.com*", "*googlesyndication.com*", "*connect.facebook.net*",
+    "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*", "*analytics.tiktok.com*",
+    "*snap.licdn.com*", "*youtube.com/embed*", "*ytimg.com*",
+]
+_MAGENTO = ["*/media/catalog/product/*", "*/static/*/fonts/*"]
+
+BLOCK_PROFILES = {
+    "2b": _MEDIA + _TRACKERS + _MAGENTO,
+    "btech": _MEDIA + _TRACKERS + _MAGENTO,
+    "raneen": _MEDIA + _TRACKERS + _MAGENTO,
+    # Next.js storefront: keep /_next/static (JS), drop the image optimizer
+    "raya": _MEDIA + _TRACKERS + ["*/_next/image*"],
+    # Shopify storefront: product images and Shopify's own analytics beacons
+    "rizkalla": _MEDIA + _TRACKERS + ["*cdn.shopify.com/s/files/*", "*monorail-edge.shopifysvc.com*", "*/api/collect*"],
+}
+
+def enable_network_log(options):
+    """Ask Chrome to record network events so transferred bytes can be measured."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+def enable_blocking(driver, retailer):
+    """Apply the retailer's blocklist to the current browser session."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCK_PROFILES[retailer]})
+    driver.blocking_profile = retailer
+
+def disable_blocking(driver):
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+    driver.blocking_profile = None
+
+def apply_blocking_to_tab(driver):
+    """Give a newly opened tab the blocklist the driver currently uses; CDP blocking is per tab."""
+    retailer = getattr(driver, "blocking_profile", None)
+    if retailer:
+        enable_blocking(driver, retailer)
+
+# === Byte Accounting ===
+def drain_network_stats(driver):
+    """
+    Read (and clear) the performance log since the last call.
+    Returns (bytes_transferred, requests_finished, requests_blocked).
+    """
+    transferred = finished = blocked = 0
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.loadingFinished":
+            transferred += int(params.get("encodedDataLength", 0))
+            finished += 1
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            blocked += 1
+    return transferred, finished, blocked
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if abs(count) < 1024:
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
+
+# === Blocked vs. Unblocked Check ===
+def compare_rows(baseline, candidate):
+    """Compare two row lists by Product URL; returns a list of human-readable differences."""
+    def key(rows):
+        return {row["Product URL"]: (row["Item Name"], row["New Price"], row["Old Price"]) for row in rows}
+    expected, actual = key(baseline), key(candidate)
+    problems = []
+    missing = expected.keys() - actual.keys()
+    extra = actual.keys() - expected.keys()
+    if missing:
+        problems.append(f"{len(missing)} products only found without blocking")
+    if extra:
+        problems.append(f"{len(extra)} products only found with blocking")
+    changed = [url for url in expected.keys() & actual.keys() if expected[url] != actual[url]]
+    if changed:
+        problems.append(f"{len(changed)} products with different title/prices (e.g. {changed[0]})")
+    return problems
+
+def check_blocking(driver, retailer, scrape, log=print):
+    """
+    Run scrape() once unblocked and once with the retailer's profile, report the bytes
+    saved and whether the extracted rows match. Returns the unblocked rows.
+    """
+    disable_blocking(driver)
+    drain_network_stats(driver)
+    baseline = scrape()
+    full_bytes, full_requests, _ = drain_network_stats(driver)
+
+    enable_blocking(driver, retailer)
+    blocked_rows = scrape()
+    lean_bytes, lean_requests, blocked = drain_network_stats(driver)
+    disable_blocking(driver)
+
+    saved = full_bytes - lean_bytes
+    share = (saved / full_bytes * 100) if full_bytes else 0
+    log(f"🧪 Blocking check: {format_bytes(full_bytes)} ({full_requests} requests) → "
+        f"{format_bytes(lean_bytes)} ({lean_requests} requests, {blocked} blocked), "
+        f"saved {format_bytes(saved)} ({share:.0f}%)")
+    problems = compare_rows(baseline, blocked_rows)
+    if problems:
+        log(f"⚠️ Blocking profile '{retailer}' changes extraction: " + "; ".join(problems))
+    else:
+        log(f"✅ Blocking profile '{retailer}' matches unblocked extraction ({len(baseline)} products)")
+    return baseline
+
+# === Scraper Integration ===
+def setup_blocking(driver, retailer, args):
+    """Apply the profile when --block-resources is set (call once per new driver)."""
+    if args.block_resources:
+        enable_blocking(driver, retailer)
+
+def scrape_with_blocking(driver, retailer, args, scrape, log=print):
+    """Run scrape() honouring --block-resources / --check-blocking and report transferred bytes."""
+    if args.check_blocking:
+        rows = check_blocking(driver, retailer, scrape, log)
+        setup_blocking(driver, retailer, args)
+        return rows
+    rows = scrape()
+    if args.block_resources:
+        transferred, requests, blocked = drain_network_stats(driver)
+        log(f"📉 Transferred {format_bytes(transferred)} in {requests} requests ({blocked} blocked)")
+    return rows
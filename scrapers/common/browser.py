@@ -0,0 +1,104 @@
+"""
+Starting and attaching Chrome drivers.
+
+With --attach a scraper claims one of the warm Chrome instances started by
+tools/browser-daemon.py (one or more per retailer, each on its own remote debugging
+port) instead of launching a new browser. The claim is a file lock, so parallel
+drivers never share a browser; on release the tab is reset to about:blank and the
+browser keeps running with its cookies and cache for the next run.
+A launched browser can use a persistent profile instead (common.profiles).
+"""
+import os
+import json
+import urllib.request
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from common.locks import try_lock, release_lock
+from common.profiles import claim_profile, use_profile
+
+SCRAPERS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+DAEMON_DIR = os.path.join(SCRAPERS_DIR, ".browser-daemon")
+DAEMON_STATE = os.path.join(DAEMON_DIR, "state.json")
+
+# Capabilities that still apply when attaching to an existing browser
+_ATTACH_CAPABILITIES = ("goog:loggingPrefs", "pageLoadStrategy")
+
+# === Daemon State ===
+def load_daemon_state():
+    try:
+        with open(DAEMON_STATE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_daemon_state(state):
+    os.makedirs(DAEMON_DIR, exist_ok=True)
+    with open(DAEMON_STATE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+def is_browser_alive(address, timeout=1):
+    """True if a Chrome DevTools endpoint answers on address (host:port)."""
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def claim_warm_browser(retailer):
+    """Lock a free, running warm browser of this retailer; returns (address, lock handle) or (None, None)."""
+    for slot in load_daemon_state().get(retailer, []):
+        lock = try_lock(os.path.join(DAEMON_DIR, "locks", f"{retailer}-{slot['port']}.lock"))
+        if lock is None:
+            continue
+        if is_browser_alive(slot["address"]):
+            return slot["address"], lock
+        release_lock(lock)
+    return None, None
+
+# === Driver Lifecycle ===
+def start_driver(options, retailer, attach=False, persistent_profile=False, cache_mb=512):
+    """
+    Attach to a warm browser when asked (and one is free), otherwise launch Chrome with
+    options, in a free persistent profile of this retailer if persistent_profile is set.
+    """
+    if attach:
+        address, lock = claim_warm_browser(retailer)
+        if address:
+            attach_options = Options()
+            attach_options.debugger_address = address
+            for name in _ATTACH_CAPABILITIES:
+                if name in options.capabilities:
+                    attach_options.set_capability(name, options.capabilities[name])
+            driver = webdriver.Chrome(options=attach_options)
+            driver.warm_browser_lock = lock
+            print(f"♻️ Attached to warm browser at {address}")
+            return driver
+        print(f"⚠️ No free warm browser for '{retailer}' (is tools/browser-daemon.py running?). Starting a new one.")
+    if not persistent_profile:
+        return webdriver.Chrome(options=options)
+    profile_dir, lock = claim_profile(retailer)
+    use_profile(options, profile_dir, cache_mb)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception:
+        release_lock(lock)
+        raise
+    driver.profile_lock = lock
+    print(f"💾 Using persistent profile {os.path.basename(profile_dir)}")
+    return driver
+
+def release_driver(driver):
+    """Quit a launched browser, or reset and hand back a warm one."""
+    lock = getattr(driver, "warm_browser_lock", None)
+    if lock is not None:
+        try:
+            driver.get("about:blank")
+        except Exception:
+            pass
+    # With debugger_address, quit() ends the chromedriver session but leaves Chrome running
+    driver.quit()
+    release_lock(lock)
+    # Only once Chrome has exited may another driver open its profile
+    release_lock(getattr(driver, "profile_lock", None))
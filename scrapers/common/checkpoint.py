@@ -0,0 +1,77 @@
+"""
+Per-category checkpoints so a crashed run can be resumed.
+
+Every category that yields rows is written to
+<output_dir>/.checkpoints/<date>/<category>.jsonl as soon as it finishes (written to
+a temp file and renamed, so a crash never leaves half a category behind). With
+--resume those categories are loaded back instead of scraped again; without it,
+today's checkpoints are cleared at start so they always describe the current run.
+The files double as the row store for the final workbook (see common.workbook), so
+the scrapers only ever hold one category in memory. A category cut short by its time
+budget is saved with a .partial marker next to it: it still goes into the workbook
+(marked partial), but --resume and fingerprint reuse treat it as not done.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+
+class CategoryCheckpoint:
+    def __init__(self, output_dir, date_str, resume=False):
+        self.directory = os.path.join(output_dir, ".checkpoints", date_str)
+        if not resume and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, category):
+        # Readable prefix plus a hash, so categories that differ only in symbols don't collide
+        slug = re.sub(r"[^\w-]+", "_", category).strip("_")[:60]
+        digest = hashlib.sha1(category.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{slug}-{digest}.jsonl")
+
+    def has(self, category):
+        """True for a complete checkpoint; partial categories are scraped again."""
+        return os.path.exists(self.path(category)) and not self.is_partial(category)
+
+    def is_partial(self, category):
+        return os.path.exists(self._partial_marker(category))
+
+    def _partial_marker(self, category):
+        return self.path(category)[:-len(".jsonl")] + ".partial"
+
+    def rows(self, category):
+        """Stream the rows of a checkpointed category one at a time."""
+        yield from self._read(self.path(category))
+
+    def complete_files(self):
+        """File names of every complete (not partial) category checkpointed on this date."""
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.endswith(".jsonl") and not os.path.exists(os.path.join(self.directory, name[:-len(".jsonl")] + ".partial"))
+        )
+
+    def file_rows(self, name):
+        """Stream the rows of one file listed by complete_files()."""
+        yield from self._read(os.path.join(self.directory, name))
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def count(self, category):
+        return sum(1 for _ in self.rows(category))
+
+    def save(self, category, rows, partial=False):
+        path = self.path(category)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        os.replace(temp_path, path)
+        if partial:
+            open(self._partial_marker(category), "w").close()
+        elif self.is_partial(category):
+            os.remove(self._partial_marker(category))
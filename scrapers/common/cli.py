@@ -0,0 +1,48 @@
+"""Command-line options shared by every retailer scraper."""
+
+def add_common_arguments(parser):
+    """Register the options every scraper understands on an argparse parser."""
+    parser.add_argument("--targets",
+                        help="Targets workbook to read instead of the scraper's default *-targets.xlsx")
+    parser.add_argument("--extract", choices=["dom", "js", "snapshot", "structured"], default="dom",
+                        help="Card parsing: 'dom' reads each card over WebDriver, 'js' reads all cards in one script call, "
+                             "'snapshot' parses page_source in a process pool while the browser moves on, "
+                             "'structured' takes prices from embedded JSON-LD / Magento / Next.js data where present")
+    parser.add_argument("--parse-workers", type=int,
+                        help="Processes parsing page_source snapshots with --extract snapshot (default: CPU count)")
+    parser.add_argument("--archive", action="store_true",
+                        help="Store a compressed snapshot of every loaded or downloaded listing page for tools/replay-snapshots.py")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="Block images, fonts, media and trackers with the retailer's CDP blocklist profile")
+    parser.add_argument("--check-blocking", action="store_true",
+                        help="Scrape each category with and without blocking, report bytes saved and any row differences")
+    parser.add_argument("--attach", action="store_true",
+                        help="Attach to a warm Chrome started by tools/browser-daemon.py instead of launching one")
+    parser.add_argument("--persistent-profile", action="store_true",
+                        help="Launch Chrome in a reusable per-retailer profile so its disk cache survives between runs")
+    parser.add_argument("--cache-mb", type=float, default=512,
+                        help="Disk cache size of the persistent profile in MB (default: 512)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse categories already checkpointed today and only scrape the missing ones")
+    parser.add_argument("--category-timeout", type=float,
+                        help="Seconds per category before loading stops and the loaded products are saved as partial")
+    parser.add_argument("--recycle-every", type=int, default=0,
+                        help="Restart Chrome after this many categories (default: only on memory limits)")
+    parser.add_argument("--max-heap-mb", type=float, default=1024,
+                        help="Restart Chrome between categories once the page's JS heap passes this size (default: 1024)")
+    parser.add_argument("--max-browser-mb", type=float, default=4096,
+                        help="Restart Chrome between categories once its processes use this much memory; needs psutil (default: 4096)")
+    return parser
+
+def parse_worker_overrides(values, retailers):
+    """Turn ['btech=4', ...] into {'btech': 4, ...}; only retailers in `retailers` accept an override."""
+    overrides = {}
+    for value in values or []:
+        name, _, count = value.partition("=")
+        name = name.strip().lower()
+        if not count.strip().isdigit():
+            raise SystemExit(f"❌ Invalid --workers value: {value!r} (expected RETAILER=N)")
+        if name not in retailers:
+            raise SystemExit(f"❌ --workers cannot be set for {name!r} (accepted: {', '.join(sorted(retailers))})")
+        overrides[name] = int(count)
+    return overrides
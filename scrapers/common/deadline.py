@@ -0,0 +1,46 @@
+"""
+Per-category time budgets.
+
+start_category_deadline() arms a deadline for the current thread (each Btech driver
+has its own thread). The long loops (scrolling, Load More, pagination) call
+deadline_expired() and stop loading once it fires, so the products already on the
+page are still parsed and saved; the scraper then marks the category as partial.
+mark_incomplete() does the same for a category that lost a page some other way (a
+failed download), so it is neither resumed nor reused by its fingerprint.
+"""
+import time
+import threading
+
+_local = threading.local()
+
+class CategoryDeadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds if seconds else None
+        self.hit = False
+        self.incomplete = False
+
+    @property
+    def partial(self):
+        return self.hit or self.incomplete
+
+def start_category_deadline(seconds):
+    """Arm a new budget of seconds (None or 0 means no limit) for this thread's next category."""
+    _local.deadline = CategoryDeadline(seconds)
+    return _local.deadline
+
+def deadline_expired():
+    """True once this thread's category budget is used up."""
+    deadline = getattr(_local, "deadline", None)
+    if deadline is None or deadline.expires is None:
+        return False
+    if not deadline.hit and time.monotonic() >= deadline.expires:
+        deadline.hit = True
+        print(f"⏱️ Category time budget of {deadline.seconds:g}s used up; keeping what is loaded so far")
+    return deadline.hit
+
+def mark_incomplete():
+    """Flag this thread's current category as missing pages, so it is saved as partial."""
+    deadline = getattr(_local, "deadline", None)
+    if deadline is not None:
+        deadline.incomplete = True
@@ -0,0 +1,144 @@
+"""
+Card extraction in a single WebDriver round trip.
+
+Each retailer has one JavaScript snippet that walks every product card on the page
+and returns the raw texts the Selenium parsers used to read one call at a time.
+Missing elements come back as null, so the scrapers can apply exactly the same
+fallback rules (and the same normalize_price) to the returned values.
+CardHarvester runs the same snippets during scrolling on just the cards that are new
+since the previous step, so parsing overlaps with loading.
+"""
+
+# === Shared JS Helpers ===
+# Selenium's .text is "" for elements that are not rendered; mirror that here.
+_JS_TEXT_HELPERS = """
+const visibleText = el => el ? (el.getClientRects().length ? el.innerText : '') : null;
+const textOf = (root, selector) => root ? visibleText(root.querySelector(selector)) : null;
+"""
+_JS_HELPERS = _JS_TEXT_HELPERS + """
+const cards = Array.from(document.querySelectorAll(arguments[0]));
+"""
+
+# Only cards not read before; a card is marked once it has a title (or on the final
+# pass), so one that is still rendering is picked up again on the next step.
+_JS_NEW_CARDS_HELPERS = _JS_TEXT_HELPERS + """
+const cards = Array.from(document.querySelectorAll(arguments[0])).filter(card => !card.hasAttribute('data-harvested'));
+"""
+_JS_MARK_HARVESTED = """
+return rows.filter((row, i) => {
+    const done = arguments[1] || !!row.title;
+    if (done) cards[i].setAttribute('data-harvested', '');
+    return done;
+});
+"""
+
+# === Per-Retailer Snippets ===
+CARD_SCRIPTS = {
+    "2b": {
+        "selector": "div.product-item-info",
+        "script": """
+return cards.map(card => {
+    const link = card.querySelector('a.product-item-link');
+    return {
+        title: visibleText(link),
+        url: link ? link.href : null,
+        special: textOf(card, '.special-price .price'),
+        regular: textOf(card, '.price-box .price'),
+        old: textOf(card, '.old-price .price'),
+    };
+});
+""",
+    },
+    "btech": {
+        "selector": "a.listingWrapperSection",
+        "script": """
+return cards.map(card => ({
+    title: textOf(card, 'h2.plpTitle'),
+    url: card.href,
+    special: textOf(card, 'span.special-price span.price-wrapper'),
+    old: textOf(card, 'span.old-price.was-price span.price-wrapper'),
+}));
+""",
+    },
+    "raneen": {
+        "selector": "div.product-item-info",
+        "script": """
+return cards.map(card => {
+    const link = card.querySelector('a.product-item-link');
+    const box = card.querySelector('.price-box.price-final_price');
+    return {
+        title: visibleText(link),
+        url: link ? link.href : null,
+        has_price_box: !!box,
+        special: textOf(box, '.special-price .price-wrapper'),
+        old: textOf(box, '.old-price .price-wrapper'),
+        regular: textOf(box, '.price-container .price-wrapper'),
+        current: textOf(box, '.current-price'),
+        old_raw: textOf(box, '.old-price'),
+    };
+});
+""",
+    },
+    "raya": {
+        "selector": "article.ProductCard",
+        "script": """
+return cards.map(card => {
+    const link = card.querySelector('a.flex.flex-col[href]');
+    return {
+        title: textOf(link, 'p.name.clamp-text'),
+        url: link ? link.href : null,
+        special: textOf(card, 'span.text-primary-500:not(.line-through)'),
+        old: textOf(card, 'span.line-through'),
+    };
+});
+""",
+    },
+    "rizkalla": {
+        "selector": "div#main-collection-product-grid > product-card",
+        "script": """
+return cards.map(card => {
+    const link = card.querySelector('section > header > div.product-card_vendor-title > h3 > a');
+    const prices = card.querySelector('footer div.product-price');
+    return {
+        title: visibleText(link),
+        url: link ? link.href : null,
+        has_price_box: !!prices,
+        special: textOf(prices, 'div.price-sale'),
+        old: textOf(prices, 'del.price-compare'),
+    };
+});
+""",
+    },
+}
+
+def extract_cards(driver, retailer, selector=None):
+    """Return one dict of raw card texts per product card, fetched with a single execute_script."""
+    config = CARD_SCRIPTS[retailer]
+    return driver.execute_script(_JS_HELPERS + config["script"], selector or config["selector"]) or []
+
+def extract_new_cards(driver, retailer, selector=None, final=False):
+    """Like extract_cards, but only for cards that appeared since the last call."""
+    config = CARD_SCRIPTS[retailer]
+    script = _JS_NEW_CARDS_HELPERS + "const rows = (() => {" + config["script"] + "})();" + _JS_MARK_HARVESTED
+    return driver.execute_script(script, selector or config["selector"], final) or []
+
+# === Incremental Harvest ===
+class CardHarvester:
+    """Collects the cards that appear after each scroll step, deduplicated by product URL."""
+
+    def __init__(self, driver, retailer, selector=None):
+        self.driver = driver
+        self.retailer = retailer
+        self.selector = selector
+        self.cards = []
+        self._seen = set()
+
+    def harvest(self, final=False):
+        """Read the new cards and return how many unique products have been collected so far."""
+        for card in extract_new_cards(self.driver, self.retailer, self.selector, final):
+            key = card.get("url") or card.get("title")
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.cards.append(card)
+        return len(self.cards)
@@ -0,0 +1,71 @@
+"""
+Skip categories whose listing hasn't changed since the last run.
+
+A fingerprint is the product count the category page advertises plus a hash of the
+names and prices on its first page, both known as soon as page 1 has loaded. Each
+run's fingerprints are kept in <output_dir>/.checkpoints/fingerprints.json with the
+run date and the number of rows that run saved; when today's fingerprint matches and
+that run loaded every advertised product, the rows come from its checkpoint
+(common.checkpoint) instead of loading the whole listing again, and (with --archive)
+the pages archived by that run are listed as today's.
+"""
+import os
+import json
+import hashlib
+import threading
+
+from common.checkpoint import CategoryCheckpoint
+
+def listing_fingerprint(total_count, first_page_rows):
+    digest = hashlib.sha1()
+    for row in first_page_rows:
+        digest.update(json.dumps([row["Item Name"], row["Old Price"], row["New Price"]], ensure_ascii=False).encode("utf-8"))
+    return f"{total_count}:{digest.hexdigest()}"
+
+class FingerprintStore:
+    def __init__(self, output_dir, date_str, enabled=True, archive=None):
+        self.output_dir = output_dir
+        self.archive = archive  # common.archive.SnapshotArchive, if pages are archived
+        self.date_str = date_str
+        self.enabled = enabled
+        self.path = os.path.join(output_dir, ".checkpoints", "fingerprints.json")
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self._current = {}
+        self._lock = threading.Lock()  # Btech workers record from several threads
+
+    def previous_rows(self, category, fingerprint, total_count):
+        """
+        Remember today's fingerprint; return the last run's rows if it matches and that run
+        saved all total_count advertised products, else None.
+        """
+        with self._lock:
+            self._current[category] = fingerprint
+            entry = self.entries.get(category)
+        if not self.enabled or not entry or entry["fingerprint"] != fingerprint:
+            return None
+        # A listing that stopped loading early would otherwise be reused short forever
+        if entry.get("rows", 0) < total_count:
+            return None
+        previous = CategoryCheckpoint(self.output_dir, entry["date"], resume=True)
+        if not previous.has(category):
+            return None
+        if self.archive:
+            self.archive.reuse(category, entry["date"])
+        return list(previous.rows(category))
+
+    def record(self, category, row_count):
+        """Store today's fingerprint and row count for a category whose rows are now checkpointed."""
+        with self._lock:
+            if category not in self._current:
+                return
+            self.entries[category] = {
+                "fingerprint": self._current.pop(category), "date": self.date_str, "rows": row_count,
+            }
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
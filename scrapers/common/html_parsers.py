@@ -0,0 +1,129 @@
+"""
+lxml parsers for listing HTML fetched without a browser.
+
+They use the same CSS selectors as the Selenium parsers and return the same raw
+card dicts as common.extractors.extract_cards, so each scraper turns them into
+rows with its own normalize_price / extract_sku.
+"""
+import re
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+
+_selectors = {}
+
+def _select(root, selector):
+    if selector not in _selectors:
+        _selectors[selector] = CSSSelector(selector)
+    return _selectors[selector](root)
+
+def _first(root, selector):
+    matches = _select(root, selector) if root is not None else []
+    return matches[0] if matches else None
+
+def _text(el):
+    """Element text with whitespace collapsed, like Selenium's .text (None if missing)."""
+    if el is None:
+        return None
+    return " ".join(el.text_content().split())
+
+def _numbers(root, selector):
+    el = _first(root, selector)
+    return [int(n) for n in re.findall(r"\d+", _text(el))] if el is not None else []
+
+def parse_document(html):
+    return lxml.html.fromstring(html)
+
+# === Rizkalla (Shopify) ===
+RIZKALLA_CATEGORY_CARDS = "div#main-collection-product-grid > product-card"
+RIZKALLA_SEARCH_CARDS = ".search-results_inner > .product-product-grid > product-card"
+
+def rizkalla_total_count(doc):
+    """Largest number in the category 'products-showing' line or the search results title."""
+    counts = _numbers(doc, "div.products-showing#products-showing") + _numbers(doc, "h3.search-results_title")
+    return max(counts) if counts else None
+
+def rizkalla_cards(doc, page_url, search_mode=False):
+    cards = []
+    for card in _select(doc, RIZKALLA_SEARCH_CARDS if search_mode else RIZKALLA_CATEGORY_CARDS):
+        link = _first(card, "section > header > div.product-card_vendor-title > h3 > a")
+        prices = _first(card, "footer div.product-price")
+        href = link.get("href") if link is not None else None
+        cards.append({
+            "title": _text(link),
+            "url": urljoin(page_url, href) if href else None,
+            "has_price_box": prices is not None,
+            "special": _text(_first(prices, "div.price-sale")),
+            "old": _text(_first(prices, "del.price-compare")),
+        })
+    return cards
+
+# === Raya (Next.js) ===
+def raya_cards(doc, page_url):
+    cards = []
+    for card in _select(doc, "article.ProductCard"):
+        link = _first(card, "a.flex.flex-col[href]")
+        href = link.get("href") if link is not None else None
+        cards.append({
+            "title": _text(_first(link, "p.name.clamp-text")),
+            "url": urljoin(page_url, href) if href else None,
+            "special": _text(_first(card, "span.text-primary-500:not(.line-through)")),
+            "old": _text(_first(card, "span.line-through")),
+        })
+    return cards
+
+# === Btech (Magento + Amasty scroll) ===
+def btech_total_count(doc):
+    numbers = _numbers(doc, "span#product-search-item-count")
+    return numbers[0] if numbers else None
+
+def btech_cards(doc, page_url):
+    cards = []
+    for card in _select(doc, "a.listingWrapperSection"):
+        href = card.get("href")
+        cards.append({
+            "title": _text(_first(card, "h2.plpTitle")),
+            "url": urljoin(page_url, href) if href else None,
+            "special": _text(_first(card, "span.special-price span.price-wrapper")),
+            "old": _text(_first(card, "span.old-price.was-price span.price-wrapper")),
+        })
+    return cards
+
+# === Magento Listings (2B, Raneen) ===
+def magento_total_count(doc):
+    """Last number of the toolbar 'Items 1-24 of 240' line."""
+    numbers = _numbers(doc, "#toolbar-amount") or _numbers(doc, ".toolbar-amount")
+    return max(numbers) if numbers else None
+
+def twob_cards(doc, page_url):
+    cards = []
+    for card in _select(doc, "div.product-item-info"):
+        link = _first(card, "a.product-item-link")
+        href = link.get("href") if link is not None else None
+        cards.append({
+            "title": _text(link),
+            "url": urljoin(page_url, href) if href else None,
+            "special": _text(_first(card, ".special-price .price")),
+            "regular": _text(_first(card, ".price-box .price")),
+            "old": _text(_first(card, ".old-price .price")),
+        })
+    return cards
+
+def raneen_cards(doc, page_url):
+    cards = []
+    for card in _select(doc, "div.product-item-info"):
+        link = _first(card, "a.product-item-link")
+        box = _first(card, ".price-box.price-final_price")
+        href = link.get("href") if link is not None else None
+        cards.append({
+            "title": _text(link),
+            "url": urljoin(page_url, href) if href else None,
+            "has_price_box": box is not None,
+            "special": _text(_first(box, ".special-price .price-wrapper")),
+            "old": _text(_first(box, ".old-price .price-wrapper")),
+            "regular": _text(_first(box, ".price-container .price-wrapper")),
+            "current": _text(_first(box, ".current-price")),
+            "old_raw": _text(_first(box, ".old-price")),
+        })
+    return cards
@@ -0,0 +1,150 @@
+"""
+Pooled HTTP fetching for storefronts that render their listings server-side.
+
+One requests.Session is shared by all worker threads so connections (and TLS
+sessions) are reused; pages are fetched concurrently with a thread pool, each
+request waiting for a slot in its host's politeness budget (common.politeness).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from common.deadline import deadline_expired, mark_incomplete
+from common.politeness import polite_request, report_empty_page, retry_after_seconds, THROTTLE_STATUSES
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+)
+
+def make_session(pool_size=8, user_agent=DEFAULT_USER_AGENT, retries=3):
+    """Session with a connection pool sized for pool_size concurrent requests and retry/backoff on 429/5xx."""
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": user_agent, "Accept-Language": "ar,en;q=0.8"})
+    return session
+
+def session_from_driver(driver, pool_size=8):
+    """Session that looks like the running browser: same user agent and cookies."""
+    session = make_session(pool_size, user_agent=driver.execute_script("return navigator.userAgent;"))
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    return session
+
+def with_query(url, **params):
+    """Return url with the given query parameters set (existing ones are kept or replaced)."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({key: str(value) for key, value in params.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def fetch_html(session, url, timeout=30):
+    """GET url within the host's budget; 429/5xx responses, including retried ones, count as throttling."""
+    with polite_request(url) as slot:
+        response = session.get(url, timeout=timeout)
+        retries = getattr(response.raw, "retries", None)
+        statuses = [response.status_code] + [attempt.status for attempt in getattr(retries, "history", ())]
+        if any(status in THROTTLE_STATUSES for status in statuses):
+            slot.fail(retry_after_seconds(response))
+    response.raise_for_status()
+    return response.text
+
+def fetch_all(session, urls, max_workers=8, timeout=30):
+    """
+    Fetch every URL concurrently. Returns a list of (url, html, error) in the order of urls;
+    html is None when the request failed.
+    """
+    def fetch(url):
+        try:
+            return url, fetch_html(session, url, timeout), None
+        except requests.RequestException as e:
+            return url, None, e
+
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+        return list(pool.map(fetch, urls))
+
+# === Paginated Listings ===
+def fetch_listing(session, url, parse_page, page_param="p", params=None, max_workers=4, max_pages=200,
+                  on_page=None, log=print):
+    """
+    Download every page of a paginated listing and return its cards, deduplicated by URL.
+
+    parse_page(html, page_url) returns (cards, total_count or None). Page 1 gives the real
+    page size (the shop may ignore a requested limit). With a total count the remaining pages
+    are fetched all at once; without one they are fetched max_workers at a time until a page
+    comes back short or a whole batch adds no new products. on_page(number, html, page_url),
+    if given, sees every downloaded page (the scrapers archive them with --archive).
+    """
+    params = dict(params or {})
+
+    def page_url(number):
+        return with_query(url, **params, **{page_param: number})
+
+    seen_urls, merged = set(), []
+
+    def add(cards):
+        added = 0
+        for card in cards:
+            if not card.get("url") or card["url"] in seen_urls:
+                continue
+            seen_urls.add(card["url"])
+            merged.append(card)
+            added += 1
+        return added
+
+    first_url = page_url(1)
+    html = fetch_html(session, first_url)
+    if on_page:
+        on_page(1, html, first_url)
+    cards, total_count = parse_page(html, first_url)
+    add(cards)
+    per_page = len(cards)
+    if not per_page:
+        report_empty_page(first_url)
+        return merged
+
+    def fetch_pages(numbers):
+        """Fetch and merge the given page numbers; returns (new products, saw a short page)."""
+        added, short_page = 0, False
+        urls = [page_url(number) for number in numbers]
+        for number, (fetched_url, html, error) in zip(numbers, fetch_all(session, urls, max_workers)):
+            if html is None:
+                log(f"⚠️ Could not download page {number}: {error}")
+                mark_incomplete()
+                continue
+            if on_page:
+                on_page(number, html, fetched_url)
+            page_cards, _ = parse_page(html, fetched_url)
+            if not page_cards and total_count:
+                report_empty_page(fetched_url)
+            added += add(page_cards)
+            short_page = short_page or len(page_cards) < per_page
+        return added, short_page
+
+    if total_count:
+        last_page = min(-(-total_count // per_page), max_pages)
+        log(f"📄 {total_count} products, {per_page} per page → fetching {last_page - 1} more pages")
+        fetch_pages(list(range(2, last_page + 1)))
+        return merged
+
+    log(f"📄 {per_page} products per page, total unknown → fetching {max_workers} pages at a time")
+    next_page = 2
+    while next_page <= max_pages and not deadline_expired():
+        added, short_page = fetch_pages(list(range(next_page, min(next_page + max_workers, max_pages + 1))))
+        if added == 0 or short_page:
+            break
+        next_page += max_workers
+    return merged
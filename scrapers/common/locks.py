@@ -0,0 +1,38 @@
+"""
+Non-blocking exclusive file locks.
+
+The lock is tied to the open file handle, so the OS drops it if the process dies;
+there are no stale lock files to clean up after a crash.
+"""
+import os
+
+def try_lock(path):
+    """Return an open handle holding an exclusive lock on path, or None if someone else holds it."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+def release_lock(handle):
+    if handle is None or handle.closed:
+        return
+    try:
+        if os.name == "nt":
+            import msvcrt
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_UN)
+    finally:
+        handle.close()
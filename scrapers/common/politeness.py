@@ -0,0 +1,128 @@
+"""
+Per-host politeness budgets with adaptive (AIMD) concurrency.
+
+Every HTTP request and every browser category load goes through polite_request(url),
+which waits for a slot in that host's budget: at most `limit` requests in flight and
+at least `delay` seconds between request starts. Healthy responses (no error and
+latency within 3x the host's running average) raise the limit by about one per full
+window of requests and shrink the delay; timeouts, 429/5xx and empty grids halve
+the limit and double the delay (honouring Retry-After). Each host settles near the
+highest load it tolerates.
+
+Browser category loads and HTTP requests have separate budgets per host, so a
+category that holds a browser slot can still download its own listing pages.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+INITIAL_LIMIT = 2
+MAX_LIMIT = 8
+MAX_DELAY = 30.0
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+
+class HostBudget:
+    """Concurrency limit, request spacing and latency baseline of one host."""
+
+    def __init__(self, name, initial=INITIAL_LIMIT, maximum=MAX_LIMIT):
+        self.name = name
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.in_flight = 0
+        self.delay = 0.0
+        self.next_start = 0.0
+        self.latency = None
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if self.in_flight < int(self.limit) and now >= self.next_start:
+                    self.in_flight += 1
+                    self.next_start = now + self.delay
+                    return
+                self.condition.wait(min(max(self.next_start - now, 0.05), 1.0))
+
+    def release(self, ok, elapsed=None, retry_after=None):
+        with self.condition:
+            self.in_flight -= 1
+            if ok:
+                self._succeeded(elapsed)
+            else:
+                self._backed_off(retry_after)
+            self.condition.notify_all()
+
+    def penalize(self, retry_after=None):
+        """Back off without a slot, e.g. for an empty page found after the request finished."""
+        with self.condition:
+            self._backed_off(retry_after)
+
+    def _succeeded(self, elapsed):
+        healthy = elapsed is None or self.latency is None or elapsed <= 3 * self.latency
+        if elapsed is not None:
+            self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        if healthy:
+            self.delay *= 0.9
+            self._set_limit(min(self.maximum, self.limit + 1 / self.limit))  # additive increase
+
+    def _backed_off(self, retry_after):
+        self.delay = min(MAX_DELAY, max(self.delay * 2, 0.5))
+        self._set_limit(max(1.0, self.limit / 2))  # multiplicative decrease
+        if retry_after:
+            self.next_start = max(self.next_start, time.monotonic() + retry_after)
+
+    def _set_limit(self, limit):
+        if int(limit) != int(self.limit):
+            print(f"🚦 {self.name}: {int(self.limit)} → {int(limit)} concurrent, {self.delay:.2f}s apart")
+        self.limit = limit
+
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+def budget_for(url, kind="http"):
+    name = f"{urlsplit(url).hostname} ({kind})"
+    with _budgets_lock:
+        if name not in _budgets:
+            _budgets[name] = HostBudget(name)
+        return _budgets[name]
+
+class RequestSlot:
+    """Handed out by polite_request; call fail() for throttling or empty results that raised no error."""
+
+    def __init__(self):
+        self.ok = True
+        self.retry_after = None
+
+    def fail(self, retry_after=None):
+        self.ok = False
+        self.retry_after = retry_after
+
+@contextmanager
+def polite_request(url, kind="http", timed=True):
+    """Hold a slot of the host's budget for the duration of the block; exceptions count as failures."""
+    budget = budget_for(url, kind)
+    budget.acquire()
+    slot = RequestSlot()
+    started = time.monotonic()
+    failed = False
+    try:
+        yield slot
+    except Exception:
+        failed = True
+        raise
+    finally:
+        # Also reached when a generator holding the slot is closed early (GeneratorExit)
+        if failed:
+            budget.release(False)
+        else:
+            budget.release(slot.ok, time.monotonic() - started if timed else None, slot.retry_after)
+
+def report_empty_page(url, kind="http"):
+    """An empty grid where products were expected usually means a soft block; back off."""
+    budget_for(url, kind).penalize()
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After", "")
+    return float(value) if value.replace(".", "", 1).isdigit() else None
@@ -0,0 +1,99 @@
+"""
+Persistent per-retailer Chrome profiles, so JS bundles, CSS and fonts stay in the
+disk cache between runs.
+
+With --persistent-profile a launched Chrome gets a user-data-dir under
+scrapers/.chrome-profiles/<retailer>-<n> instead of a fresh temporary profile, with
+its disk cache capped at --cache-mb. Each profile is held with a file lock
+(common.locks) while a browser uses it: parallel drivers (Btech workers, a second run)
+take the next free profile instead of sharing one, which Chrome would refuse or
+corrupt. tools/chrome-profiles.py lists the profiles and cleans up old ones.
+"""
+import os
+import time
+import shutil
+
+from common.locks import try_lock, release_lock
+
+SCRAPERS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+PROFILES_DIR = os.path.join(SCRAPERS_DIR, ".chrome-profiles")
+
+# Cache folders Chrome rebuilds on its own; cleanup empties these and keeps cookies and settings
+CACHE_DIRS = (
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    "GrShaderCache",
+    "ShaderCache",
+)
+
+def lock_path(profile_dir):
+    return profile_dir + ".lock"
+
+def claim_profile(retailer):
+    """Lock the first free profile of this retailer (creating one if all are busy); returns (path, lock)."""
+    number = 1
+    while True:
+        profile_dir = os.path.join(PROFILES_DIR, f"{retailer}-{number}")
+        lock = try_lock(lock_path(profile_dir))
+        if lock is not None:
+            os.makedirs(profile_dir, exist_ok=True)
+            os.utime(lock_path(profile_dir))  # last-used time for cleanup
+            return profile_dir, lock
+        number += 1
+
+def use_profile(options, profile_dir, cache_mb):
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument(f"--disk-cache-size={int(cache_mb * 1024 * 1024)}")
+
+# === Maintenance ===
+def list_profiles():
+    """Every profile directory as (name, path)."""
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+    return sorted(
+        (name, os.path.join(PROFILES_DIR, name)) for name in os.listdir(PROFILES_DIR)
+        if os.path.isdir(os.path.join(PROFILES_DIR, name))
+    )
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def last_used(profile_dir):
+    try:
+        return os.path.getmtime(lock_path(profile_dir))
+    except OSError:
+        return os.path.getmtime(profile_dir)
+
+def clean_profile(profile_dir, older_than_days, max_mb, log=print):
+    """
+    Delete a profile unused for older_than_days, or empty its caches once it passes
+    max_mb. Profiles in use are skipped. Returns the bytes freed.
+    """
+    lock = try_lock(lock_path(profile_dir))
+    if lock is None:
+        log(f"⏭️ {os.path.basename(profile_dir)} is in use, skipped")
+        return 0
+    try:
+        size = directory_size(profile_dir)
+        idle_days = (time.time() - last_used(profile_dir)) / 86400
+        if idle_days > older_than_days:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            log(f"🗑️ {os.path.basename(profile_dir)}: removed, unused for {idle_days:.0f} days")
+            return size
+        if size > max_mb * 1024 * 1024:
+            for cache_dir in CACHE_DIRS:
+                shutil.rmtree(os.path.join(profile_dir, cache_dir), ignore_errors=True)
+            freed = size - directory_size(profile_dir)
+            log(f"🧹 {os.path.basename(profile_dir)}: emptied caches, freed {freed / 1024 / 1024:.0f} MB")
+            return freed
+        return 0
+    finally:
+        release_lock(lock)
@@ -0,0 +1,95 @@
+"""
+Driver recycling for long runs.
+
+After many long infinite-scroll pages Chrome's memory keeps growing and pages get
+slower. Between categories the scrapers ask DriverRecycler whether to replace the
+driver: every N categories, or once the JS heap of the page or the resident memory
+of the whole Chrome process tree passes a limit. Replacing means release_driver()
+and a fresh driver from the scraper's own create_driver(). The RSS check needs the
+optional psutil package; without it only the JS heap is watched. A driver whose
+Chrome has crashed is replaced the same way (session_alive / replace).
+"""
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from selenium.common.exceptions import WebDriverException
+
+from common.browser import release_driver
+
+def js_heap_mb(driver):
+    """Used JS heap of the current page in MB (CDP Performance metrics), or None."""
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+    except Exception:
+        return None
+    for metric in metrics:
+        if metric["name"] == "JSHeapUsedSize":
+            return metric["value"] / 2 ** 20
+    return None
+
+def browser_rss_mb(driver):
+    """Resident memory in MB of chromedriver and every Chrome process under it, or None."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if psutil is None or process is None:
+        return None
+    try:
+        root = psutil.Process(process.pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for child in processes:
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 2 ** 20
+
+def session_alive(driver):
+    """False once Chrome or chromedriver has gone away (every command then fails at once)."""
+    try:
+        driver.execute_script("return 1;")
+        return True
+    except WebDriverException:
+        return False
+
+class DriverRecycler:
+    def __init__(self, create_driver, every=0, max_heap_mb=None, max_rss_mb=None, log=print):
+        self.create_driver = create_driver
+        self.every = every
+        self.max_heap_mb = max_heap_mb
+        self.max_rss_mb = max_rss_mb
+        self.log = log
+        self.categories = 0
+
+    def recycle_reason(self, driver):
+        if self.every and self.categories >= self.every:
+            return f"{self.categories} categories"
+        heap = js_heap_mb(driver) if self.max_heap_mb else None
+        if heap and heap > self.max_heap_mb:
+            return f"JS heap reached {heap:.0f} MB"
+        rss = browser_rss_mb(driver) if self.max_rss_mb else None
+        if rss and rss > self.max_rss_mb:
+            return f"Chrome memory reached {rss:.0f} MB"
+        return None
+
+    def check(self, driver):
+        """Call after each category; returns the driver to use next (a fresh one if a limit was hit)."""
+        self.categories += 1
+        reason = self.recycle_reason(driver)
+        if not reason:
+            return driver
+        self.log(f"♻️ Recycling Chrome after {reason}")
+        return self.replace(driver)
+
+    def replace(self, driver):
+        """Release driver (alive or not) and return a fresh one from create_driver()."""
+        try:
+            release_driver(driver)
+        except Exception:
+            pass  # a crashed session can't be shut down cleanly
+        self.categories = 0
+        return self.create_driver()
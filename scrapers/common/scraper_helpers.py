@@ -0,0 +1,32 @@
+"""
+The row helpers of a retailer scraper, without running the script.
+
+The scraper scripts start Chrome and read their targets at import, so the tools that
+need a scraper's own rules (tools/replay-snapshots.py rebuilding rows, the watchlist
+probe normalizing codes) copy the plain helper functions and SHEET_STYLE out of the
+script's source with ast on every run. A fixed extract_sku or price rule therefore
+applies to them straight away.
+"""
+import os
+import re
+import ast
+
+SCRAPERS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+ROW_HELPERS = {"normalize_price", "extract_sku", "normalize_sku", "price_or_none", "make_row", "prices_from_card", "rows_from_cards",
+               "sheet_name"}
+
+def load_scraper_helpers(retailer):
+    """The scraper's row-building and sheet-name functions (as a namespace dict) and its SHEET_STYLE."""
+    path = os.path.join(SCRAPERS_DIR, retailer, f"{retailer}-scraper.py")
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    functions, style = [], None
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name in ROW_HELPERS:
+            functions.append(node)
+        elif isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "SHEET_STYLE" for target in node.targets):
+            style = ast.literal_eval(node.value)
+    namespace = {"re": re}
+    exec(compile(ast.Module(body=functions, type_ignores=[]), path, "exec"), namespace)
+    return namespace, style
@@ -0,0 +1,125 @@
+"""
+Event-driven waits and the shared scroll loop for infinite-scroll grids.
+
+Instead of sleeping a fixed time after each scroll, an in-page MutationObserver
+reports back as soon as more cards matching the selector are in the DOM, or once
+the page has been quiet (no DOM mutations) for a short period. scroll_to_end()
+drives that wait for 2B, Raneen and Raya: cards are counted in JavaScript, the
+quiet period follows how long each retailer has actually taken to load the next
+batch, and scrolling stops at the expected total or after a few stagnant steps.
+"""
+import time
+
+from common.deadline import deadline_expired
+
+# === Scroll Profiles ===
+# initial_latency: first guess (s) of how long a batch takes to appear
+# min_quiet / max_quiet: bounds for the quiet period derived from observed latency
+# max_wait: hard cap (s) on one scroll step; stagnant_limit: steps without new cards before stopping
+# sleep_stagnant_limit: the same for fixed_wait steps, which can end before a slow batch arrives
+SCROLL_PROFILES = {
+    "2b": {"initial_latency": 1.5, "min_quiet": 0.75, "max_quiet": 4, "max_wait": 10, "stagnant_limit": 2},
+    "raneen": {"initial_latency": 1.5, "min_quiet": 0.75, "max_quiet": 4, "max_wait": 10, "stagnant_limit": 3},
+    "raya": {"initial_latency": 2.0, "min_quiet": 1.0, "max_quiet": 5, "max_wait": 10, "stagnant_limit": 5,
+             "sleep_stagnant_limit": 10},
+}
+
+# === MutationObserver Wait ===
+_WAIT_FOR_MORE_CARDS_JS = """
+const [selector, previous, timeoutMs, quietMs, done] = arguments;
+const count = () => document.querySelectorAll(selector).length;
+if (count() > previous) {
+    done(count());
+    return;
+}
+let finished = false;
+let quietTimer = null;
+let hardTimer = null;
+let observer = null;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(hardTimer);
+    done(count());
+};
+observer = new MutationObserver(() => {
+    if (count() > previous) {
+        finish();
+    } else {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(finish, quietMs);
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+quietTimer = setTimeout(finish, quietMs);
+hardTimer = setTimeout(finish, timeoutMs);
+"""
+
+def count_cards(driver, selector):
+    """Count matching elements in the page without returning WebElements."""
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", selector)
+
+def wait_for_more_cards(driver, selector, previous_count, timeout=10, quiet_period=1.5):
+    """
+    Block until more than previous_count elements match selector, the DOM has not
+    changed for quiet_period seconds, or timeout seconds have passed.
+    Returns the card count at that moment.
+    """
+    driver.set_script_timeout(timeout + 5)
+    return driver.execute_async_script(
+        _WAIT_FOR_MORE_CARDS_JS,
+        selector,
+        previous_count,
+        int(timeout * 1000),
+        int(quiet_period * 1000),
+    )
+
+# === Scroll Engine ===
+def scroll_to_end(driver, retailer, selector, expected_total=None, fixed_wait=None, quiet_period=None,
+                  on_step=None, log=print):
+    """
+    Scroll until expected_total cards are loaded or the grid stops growing; returns the final progress.
+
+    The quiet period is twice the smoothed time new cards took to appear, clamped to the
+    retailer profile, unless quiet_period pins it. fixed_wait sleeps that long per step
+    instead of watching the DOM. on_step(count) runs after every step; if it returns a
+    number (e.g. products harvested so far), that is the progress checked against
+    expected_total and the stagnant limit instead of the DOM card count.
+    """
+    profile = SCROLL_PROFILES[retailer]
+    latency = profile["initial_latency"]
+    count = count_cards(driver, selector)
+    progress = count
+    stagnant = 0
+    stagnant_limit = profile.get("sleep_stagnant_limit", profile["stagnant_limit"]) if fixed_wait else profile["stagnant_limit"]
+    while True:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        started = time.monotonic()
+        if fixed_wait:
+            time.sleep(fixed_wait)
+            new_count = count_cards(driver, selector)
+        else:
+            quiet = quiet_period or min(max(latency * 2, profile["min_quiet"]), profile["max_quiet"])
+            new_count = wait_for_more_cards(driver, selector, count, timeout=profile["max_wait"], quiet_period=quiet)
+            if new_count > count:
+                latency = 0.7 * latency + 0.3 * (time.monotonic() - started)
+        step_progress = on_step(new_count) if on_step else None
+        new_progress = new_count if step_progress is None else step_progress
+
+        log(f"🔄 Loaded {new_progress}{f' / {expected_total}' if expected_total else ''} products...")
+        if deadline_expired():
+            return new_progress
+        if expected_total and new_progress >= expected_total:
+            log(f"✅ Loaded all {new_progress} expected products.")
+            return new_progress
+        if new_progress > progress:
+            stagnant = 0
+        else:
+            stagnant += 1
+            if stagnant >= stagnant_limit:
+                log(f"🔚 No new products after {stagnant} scrolls.")
+                return new_progress
+        count = new_count
+        progress = new_progress
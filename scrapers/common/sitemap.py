@@ -0,0 +1,120 @@
+"""
+Streaming sitemap reader for catalog discovery without rendering listings.
+
+Sitemaps and sitemap indexes (plain or gzipped) are read straight off the HTTP
+response with lxml's iterparse, and every <url> element is cleared as soon as it has
+been yielded, so memory stays flat however many products a shop lists. Indexes are
+followed one child sitemap at a time. Downloads go through the host's politeness
+budget (common.politeness) like every other request.
+"""
+import io
+import re
+import gzip
+from urllib.parse import urlsplit, unquote
+
+from lxml import etree
+
+from common.politeness import polite_request
+
+IMAGE_NS = "http://www.google.com/schemas/sitemap-image/1.1"
+
+# How product URLs are told apart from categories and CMS pages in each shop's sitemap:
+# a regex on the URL, or None for "entries with an <image:image>" (Magento only
+# attaches images to products)
+PRODUCT_RULES = {
+    "2b": None,
+    "btech": None,
+    "raneen": None,
+    "raya": None,
+    "rizkalla": r"/products/",
+}
+
+def _localname(element):
+    return etree.QName(element).localname
+
+def _child_text(element, name):
+    for child in element:
+        if isinstance(child.tag, str) and _localname(child) == name:
+            return (child.text or "").strip()
+    return None
+
+def _open_stream(response):
+    """File-like body of a sitemap response, gunzipped when the file itself is gzip (not just the transfer)."""
+    response.raw.decode_content = True
+    response.raw.auto_close = False  # io wrappers expect to close the stream themselves
+    stream = io.BufferedReader(response.raw)
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+def sitemaps_from_robots(session, base_url):
+    """Sitemap URLs announced in robots.txt, or the conventional /sitemap.xml."""
+    robots_url = base_url.rstrip("/") + "/robots.txt"
+    try:
+        with polite_request(robots_url):
+            response = session.get(robots_url, timeout=30)
+        found = re.findall(r"(?im)^\s*sitemap:\s*(\S+)", response.text) if response.ok else []
+    except Exception:
+        found = []
+    return found or [base_url.rstrip("/") + "/sitemap.xml"]
+
+def iter_sitemap(session, url, failed=None, log=print):
+    """
+    Yield one dict per <url> entry (loc, lastmod, has_image) of url and, for a sitemap
+    index, of every sitemap it lists. Sitemaps that could not be read (completely) are
+    appended to failed.
+    """
+    pending, seen = [url], set()
+    while pending:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        children, count = [], 0
+        try:
+            with polite_request(sitemap_url, timed=False):  # streaming time says nothing about load
+                response = session.get(sitemap_url, stream=True, timeout=60)
+                response.raise_for_status()
+                for _, element in etree.iterparse(_open_stream(response), events=("end",), resolve_entities=False):
+                    if not isinstance(element.tag, str):
+                        continue
+                    name = _localname(element)
+                    if name == "sitemap":
+                        loc = _child_text(element, "loc")
+                        if loc:
+                            children.append(loc)
+                    elif name == "url":
+                        loc = _child_text(element, "loc")
+                        if loc:
+                            count += 1
+                            yield {
+                                "loc": loc,
+                                "lastmod": _child_text(element, "lastmod"),
+                                "has_image": element.find(f"{{{IMAGE_NS}}}image") is not None,
+                            }
+                    else:
+                        continue
+                    # Drop the finished entry and everything before it
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+        except Exception as e:
+            log(f"⚠️ Could not read sitemap {sitemap_url}: {e}")
+            if failed is not None:
+                failed.append(sitemap_url)
+            continue
+        log(f"🗺️ {sitemap_url}: {count} URLs" + (f", {len(children)} child sitemaps" if children else ""))
+        pending.extend(children)
+
+def is_product(entry, rule):
+    return bool(re.search(rule, entry["loc"])) if rule else entry["has_image"]
+
+def fetchable_url(url):
+    """url with a doubled "https://host" prefix (as in Raya's Product URL column) reduced to the last one."""
+    return re.sub(r"^(?:https?://[^/?#]*)+?(?=https?://)", "", url.strip())
+
+def url_key(url):
+    """Host-independent, decoded path (plus query, if any) of a URL, so sitemap and scraped URLs compare equal."""
+    parts = urlsplit(fetchable_url(url))
+    key = unquote(parts.path).rstrip("/")
+    return f"{key}?{unquote(parts.query)}" if parts.query else key
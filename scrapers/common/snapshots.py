@@ -0,0 +1,83 @@
+"""
+Parse page_source snapshots in worker processes so the browser never waits on parsing.
+
+With --extract snapshot a scraper takes one driver.page_source per fully loaded
+category (or page) and submits it here. A process pool parses it with the lxml
+parsers of common.html_parsers, which use the same selectors as the browser code
+and return the same raw card dicts as common.extractors.extract_cards. The scraper
+gets a PendingRows back right away and loads the next category while the pool
+parses; rows are built with the scraper's own rows_from_cards when they are saved.
+
+Workers are forked so they don't re-run the scraper script, which does its work at
+import time. Where fork isn't available (Windows) a thread pool is used instead;
+lxml releases the GIL while parsing, so it still runs in parallel.
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from common import html_parsers
+
+def _parse(parser_name, html, page_url, options):
+    return getattr(html_parsers, parser_name)(html_parsers.parse_document(html), page_url, **options)
+
+def _ready():
+    return True
+
+def parse_pool(workers=None):
+    """Forked process pool (thread pool where fork isn't available) with every worker already started."""
+    workers = workers or os.cpu_count() or 2
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return ThreadPoolExecutor(workers)
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    # Fork every worker now, before the scraper starts threads of its own
+    pool.submit(_ready).result()
+    return pool
+
+class PendingRows:
+    """Rows of one category whose snapshots are still being parsed."""
+
+    def __init__(self, futures, to_rows):
+        self.futures = futures
+        self.to_rows = to_rows
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def result(self):
+        """Wait for every snapshot and return the rows in snapshot order."""
+        cards = []
+        for future in self.futures:
+            cards.extend(future.result())
+        return self.to_rows(cards)
+
+class SnapshotParser:
+    def __init__(self, parser_name, workers=None, wait=False):
+        """
+        parser_name is a card parser in common.html_parsers, e.g. "rizkalla_cards".
+        With wait=True rows() blocks and returns plain rows (used by --check-blocking,
+        which compares the rows of two runs straight away).
+        """
+        self.parser_name = parser_name
+        self.wait = wait
+        self._pool = parse_pool(workers)
+
+    def submit(self, driver, **options):
+        """Snapshot the current page and queue it for parsing; returns a future of raw card dicts."""
+        return self._pool.submit(_parse, self.parser_name, driver.page_source, driver.current_url, options)
+
+    def rows(self, futures, to_rows):
+        pending = PendingRows(futures, to_rows)
+        return pending.result() if self.wait else pending
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+def save_in_order(pending, save, flush=False):
+    """
+    Save (key, data, partial) entries from the front of the pending deque once their
+    rows are ready, keeping category order; flush waits for all of them.
+    """
+    while pending and (flush or not isinstance(pending[0][1], PendingRows) or pending[0][1].done()):
+        key, data, partial = pending.popleft()
+        save(key, data.result() if isinstance(data, PendingRows) else data, partial)
@@ -0,0 +1,143 @@
+"""
+Prices and model numbers from the product data shops embed in their HTML.
+
+With --extract structured the scrapers still find each product's title and URL with
+their card selectors, then take its prices from machine-readable data on the same
+page when there is any: JSON-LD Product/Offer blocks, Magento's data-price-amount
+attributes, and (Raya) the Next.js __NEXT_DATA__ records read by common.xhr_capture.
+These are exact numbers, so normalize_price isn't needed for them; a JSON-LD mpn or
+model becomes the Product Code. Products without embedded data keep the prices read
+from the visible text.
+"""
+import json
+from urllib.parse import urljoin
+
+from common.xhr_capture import number
+from common.sitemap import url_key
+
+# === JSON-LD ===
+def _json_ld_nodes(doc):
+    """Every JSON object inside the page's ld+json scripts, nested ones (@graph, ItemList) included."""
+    for script in doc.xpath('//script[@type="application/ld+json"]'):
+        try:
+            stack = [json.loads(script.text_content())]
+        except ValueError:
+            continue
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                yield node
+                stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+
+def _offer_prices(offers):
+    """(price, struck-through price) of an Offer, AggregateOffer or list of offers."""
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    if not isinstance(offers, dict):
+        return None, None
+    price = number(offers.get("price")) or number(offers.get("lowPrice"))
+    old_price = None
+    specs = offers.get("priceSpecification")
+    for spec in specs if isinstance(specs, list) else [specs]:
+        if isinstance(spec, dict) and str(spec.get("priceType", "")).endswith(("StrikethroughPrice", "ListPrice")):
+            old_price = number(spec.get("price"))
+    return price, old_price
+
+def json_ld_offers(doc, page_url):
+    offers = {}
+    for node in _json_ld_nodes(doc):
+        types = node.get("@type")
+        if "Product" not in (types if isinstance(types, list) else [types]):
+            continue
+        offer = node.get("offers")
+        url = node.get("url") or (offer.get("url") if isinstance(offer, dict) else None) or page_url
+        price, old_price = _offer_prices(offer)
+        if price is None:
+            continue
+        code = node.get("mpn") or node.get("model")
+        offers[url_key(urljoin(page_url, url))] = {
+            "new": price, "old": old_price, "code": code.strip() if isinstance(code, str) else None,
+        }
+    return offers
+
+# === Magento Price Attributes ===
+def magento_offers(doc, page_url):
+    """finalPrice / oldPrice amounts of each price box, keyed by the product link of its card."""
+    offers = {}
+    for final in doc.xpath('//*[@data-price-type="finalPrice"][@data-price-amount]'):
+        # Climb to the card: the nearest ancestor that is, or contains, a product link
+        card, link = final, None
+        for _ in range(10):
+            card = card.getparent()
+            if card is None:
+                break
+            if card.tag == "a" and card.get("href"):
+                link = card
+                break
+            anchors = card.xpath(".//a[@href]")
+            if anchors:
+                link = anchors[0]
+                break
+        if link is None:
+            continue
+        old = card.xpath('.//*[@data-price-type="oldPrice"][@data-price-amount]')
+        offers.setdefault(url_key(urljoin(page_url, link.get("href"))), {
+            "new": number(final.get("data-price-amount")),
+            "old": number(old[0].get("data-price-amount")) if old else None,
+            "code": None,
+        })
+    return offers
+
+# === Scraper Integration ===
+def structured_offers(doc, page_url):
+    """Embedded prices on a page as {url_key: {"new", "old", "code"}}; JSON-LD wins over Magento attributes."""
+    offers = magento_offers(doc, page_url)
+    offers.update(json_ld_offers(doc, page_url))
+    return offers
+
+def offers_from_rows(rows):
+    """Offers from rows already built from embedded JSON (e.g. Raya's __NEXT_DATA__ records)."""
+    return {url_key(row["Product URL"]): {"new": row["New Price"], "old": row["Old Price"], "code": None} for row in rows}
+
+def _shown_old_price(offer):
+    """The cards only show a struck-through price when there is a discount."""
+    return offer["old"] if offer["old"] is not None and offer["old"] > offer["new"] else None
+
+def apply_structured(rows, offers, normalize_sku):
+    """Replace the selector prices of every row that has embedded data; returns how many did."""
+    applied = 0
+    for row in rows:
+        offer = offers.get(url_key(row["Product URL"]))
+        if not offer or offer["new"] is None:
+            continue
+        row["New Price"] = offer["new"]
+        row["Old Price"] = _shown_old_price(offer)
+        if offer["code"]:
+            row["Product Code"] = offer["code"]
+            row["Normalized Code"] = normalize_sku(offer["code"])
+        applied += 1
+    return applied
+
+# === Product Pages ===
+def product_page_offer(doc, page_url):
+    """
+    Price of the product a detail page is about, or None: its JSON-LD Product (the only
+    one, or the one with this URL), Magento's main price box, or the price meta tags.
+    """
+    offers = json_ld_offers(doc, page_url)
+    offer = offers.get(url_key(page_url)) or (next(iter(offers.values())) if len(offers) == 1 else None)
+    if offer is None:
+        main = '//*[contains(concat(" ", @class, " "), " product-info-main ")]'
+        final = doc.xpath(main + '//*[@data-price-type="finalPrice"][@data-price-amount]')
+        old = doc.xpath(main + '//*[@data-price-type="oldPrice"][@data-price-amount]')
+        meta = doc.xpath('//meta[@property="product:price:amount" or @property="og:price:amount"]/@content')
+        if final:
+            offer = {"new": number(final[0].get("data-price-amount")),
+                     "old": number(old[0].get("data-price-amount")) if old else None, "code": None}
+        elif meta:
+            offer = {"new": number(meta[0]), "old": None, "code": None}
+    if offer is None or offer["new"] is None:
+        return None
+    return dict(offer, old=_shown_old_price(offer))
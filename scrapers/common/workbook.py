@@ -0,0 +1,72 @@
+"""
+Streaming writer for the final all-categories workbook.
+
+Rows are read back from the per-category checkpoint files (common.checkpoint) into
+an openpyxl write-only workbook, so memory stays flat however large the catalog is.
+Write-only sheets can't be restyled once written, so each file is read twice: once
+to measure column widths, once to write styled cells. The layout matches what the
+scrapers used to produce with pd.ExcelWriter + style_sheet: a merged title row, a
+coloured header row, auto-fit columns and a fixed-width, shrink-to-fit URL column.
+Categories saved as partial get "(partial)" at the end of their title row.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
+
+COLUMNS = ["Item Name", "Old Price", "New Price", "Product Code", "Normalized Code", "Product URL"]
+
+def column_widths(rows, style):
+    """Longest non-empty value per column plus padding; the URL column has a fixed width."""
+    longest = [0] * len(COLUMNS)
+    for row in rows:
+        for i, column in enumerate(COLUMNS):
+            value = row.get(column)
+            if value:
+                longest[i] = max(longest[i], len(str(value)))
+    return [
+        style["url_width"] if column == "Product URL" else longest[i] + style["width_padding"]
+        for i, column in enumerate(COLUMNS)
+    ]
+
+def write_workbook(output_file, sheets, checkpoint, style, date_str):
+    """Write one styled sheet per (category, sheet_name), streaming rows from checkpoint."""
+    header_fill = PatternFill(start_color=style["header_color"], end_color=style["header_color"], fill_type="solid")
+    header_font = Font(color=style["header_font_color"], bold=True)
+    body_font = Font(color="000000")
+    center_align = Alignment(horizontal="center", vertical="center")
+    url_align = Alignment(horizontal="left", vertical="center", wrap_text=False, shrink_to_fit=True)
+    border = Border(bottom=Side(border_style="thin", color="000000"))
+
+    def styled(ws, value, font, alignment, fill=None, cell_border=None):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        cell.alignment = alignment
+        if fill:
+            cell.fill = fill
+        if cell_border:
+            cell.border = cell_border
+        return cell
+
+    wb = Workbook(write_only=True)
+    for category, sheet_name in sheets:
+        ws = wb.create_sheet(sheet_name)
+        # Widths have to be set before the first row is written
+        for i, width in enumerate(column_widths(checkpoint.rows(category), style), start=1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+
+        # Merged title row (Row 1) and column header row (Row 2)
+        title = f"{style['title']} {category} {date_str}"
+        if checkpoint.is_partial(category):
+            title += " (partial)"
+        ws.append([styled(ws, title, header_font, center_align, header_fill)])
+        ws.merged_cells.add(f"A1:{get_column_letter(len(COLUMNS))}1")
+        ws.append([styled(ws, column, header_font, center_align, header_fill, border) for column in COLUMNS])
+
+        for row in checkpoint.rows(category):
+            ws.append([
+                styled(ws, row.get(column), body_font, url_align if column == "Product URL" else center_align,
+                       cell_border=border)
+                for column in COLUMNS
+            ])
+    wb.save(output_file)
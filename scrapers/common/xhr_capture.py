@@ -0,0 +1,99 @@
+"""
+Capture JSON API responses the page makes while we scroll.
+
+Chrome's performance log (see common.blocking.enable_network_log) carries the CDP
+Network events; for every JSON response whose URL matches a pattern we pull the
+body with Network.getResponseBody once it has finished loading. Product records
+are then picked out of the payloads by shape, so no per-card DOM reads are needed.
+"""
+import json
+import re
+
+# === Response Collector ===
+class JsonResponseCollector:
+    """Collects decoded JSON bodies of matching responses across several drain() calls."""
+
+    def __init__(self, url_pattern):
+        self.url_pattern = re.compile(url_pattern)
+        self.payloads = []
+        self._pending = {}
+
+    def reset(self, driver):
+        """Enable network events and throw away everything logged so far."""
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.get_log("performance")
+        self.payloads = []
+        self._pending = {}
+
+    def drain(self, driver):
+        """Read new log entries and fetch the bodies of matching responses that finished loading."""
+        for entry in driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                if "json" in response.get("mimeType", "") and self.url_pattern.search(response.get("url", "")):
+                    self._pending[params["requestId"]] = response["url"]
+            elif method == "Network.loadingFinished" and params.get("requestId") in self._pending:
+                self._read_body(driver, params["requestId"])
+        return self.payloads
+
+    def _read_body(self, driver, request_id):
+        url = self._pending.pop(request_id)
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            self.payloads.append(json.loads(body.get("body", "")))
+        except Exception as e:
+            print(f"⚠️ Could not read response body of {url}: {e}")
+
+def next_data_payload(driver):
+    """The Next.js __NEXT_DATA__ JSON (server-rendered first page), or None."""
+    text = driver.execute_script(
+        "const el = document.getElementById('__NEXT_DATA__'); return el ? el.textContent : null;"
+    )
+    try:
+        return json.loads(text) if text else None
+    except ValueError:
+        return None
+
+# === Product Records ===
+NAME_KEYS = ("name", "title", "product_name")
+PRICE_KEYS = ("price", "final_price", "special_price", "regular_price", "price_range", "prices")
+URL_KEYS = ("url", "canonical_url", "url_path", "href")
+SLUG_KEYS = ("url_key", "slug")
+
+def find_products(payload):
+    """
+    Yield every dict in payload that looks like a product: a name, some price field and a
+    URL or slug. Filter facets and cart lines have the first two but no page of their own.
+    """
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            has_name = any(isinstance(node.get(key), str) for key in NAME_KEYS)
+            has_url = any(isinstance(node.get(key), str) and node[key] for key in URL_KEYS + SLUG_KEYS)
+            if has_name and has_url and any(key in node for key in PRICE_KEYS):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+
+def number(value):
+    """Price value from JSON (number, numeric string or {'value': ...}) as int, else None."""
+    if isinstance(value, dict):
+        for key in ("value", "amount", "price"):
+            if key in value:
+                return number(value[key])
+        return None
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(round(float(str(value).replace(",", ""))))
+    except ValueError:
+        return None
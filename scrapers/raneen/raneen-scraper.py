@@ -1,4 +1,3 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -8,21 +7,67 @@ import time
 import pandas as pd
 import os
 import re
+import sys
+import argparse
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from collections import deque
+
+# === Shared Helpers ===
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from common.cli import add_common_arguments
+from common.extractors import extract_cards, CardHarvester
+from common.scroll import scroll_to_end
+from common.browser import start_driver, release_driver
+from common.recycle import DriverRecycler
+from common.checkpoint import CategoryCheckpoint
+from common.workbook import write_workbook
+from common.snapshots import SnapshotParser, save_in_order
+from common.archive import SnapshotArchive
+from common.blocking import enable_network_log, setup_blocking, scrape_with_blocking
+from common.deadline import start_category_deadline
+from common.politeness import polite_request
+from common.http_fetch import make_session, fetch_listing
+from common.html_parsers import parse_document, magento_total_count, raneen_cards
+from common.structured import structured_offers, apply_structured
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Raneen category scraper")
+add_common_arguments(parser)
+parser.add_argument("--fetch", choices=["browser", "http"], default="browser",
+                    help="'browser' scrolls the listing in Chrome, 'http' downloads it in large pages without a browser")
+parser.add_argument("--page-size", type=int, default=100,
+                    help="product_list_limit requested per page in --fetch http mode (default: 100)")
+parser.add_argument("--http-workers", type=int, default=4,
+                    help="Pages downloaded at a time in --fetch http mode (default: 4)")
+parser.add_argument("--harvest", action="store_true",
+                    help="Read new cards after every scroll step, deduplicated by URL, instead of parsing the whole grid at the end")
+args = parser.parse_args()
 
 # === Chrome Setup ===
-options = Options()
-# options.add_argument('--headless=new')  # Uncomment for headless mode
-options.add_argument('--disable-gpu')
-options.add_argument('--window-size=1920,1080')
-driver = webdriver.Chrome(options=options)
-wait = WebDriverWait(driver, 10)
+def create_driver():
+    """Start a Chrome driver with the Raneen options."""
+    options = Options()
+    # options.add_argument('--headless=new')  # Uncomment for headless mode
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    if args.block_resources or args.check_blocking:
+        enable_network_log(options)
+    driver = start_driver(options, "raneen", attach=args.attach,
+                          persistent_profile=args.persistent_profile, cache_mb=args.cache_mb)
+    if args.category_timeout:
+        driver.set_page_load_timeout(args.category_timeout)
+    setup_blocking(driver, "raneen", args)
+    return driver
+
+driver = wait = session = None
+if args.fetch == "browser":
+    driver = create_driver()
+    wait = WebDriverWait(driver, 10)
+else:
+    session = make_session(pool_size=args.http_workers)
 
 # === Input Excel ===
-input_excel = "raneen-targets.xlsx"
+input_excel = args.targets or "raneen-targets.xlsx"
 df = pd.read_excel(input_excel, header=1)
 df.columns = df.columns.str.strip()
 df = df.dropna(subset=["Category", "URL"])
@@ -35,63 +80,25 @@ os.makedirs(output_dir, exist_ok=True)
 # === Final Output File (One Workbook) ===
 timestamp = datetime.now().strftime("%Y-%m-%d")
 output_file = os.path.join(output_dir, f"raneen-all-categories_{timestamp}.xlsx")
+checkpoint = CategoryCheckpoint(output_dir, timestamp, resume=args.resume)
+archive = SnapshotArchive(output_dir, timestamp, enabled=args.archive)
+snapshots = SnapshotParser("raneen_cards", args.parse_workers, wait=args.check_blocking) if args.extract == "snapshot" else None
 
-# === Excel Styling Function (Per Sheet) ===
-def style_sheet(ws, category_name, date_str):
-    """Apply consistent styling: centered body, header, fixed URL column width."""
-    header_fill = PatternFill(start_color="8B0000", end_color="8B0000", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    body_font = Font(color="000000")
-    center_align = Alignment(horizontal="center", vertical="center")
-    border = Border(bottom=Side(border_style="thin", color="000000"))
-
-    # Insert and merge header row (Row 1)
-    ws.insert_rows(1)
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=6)
-    merged_cell = ws.cell(row=1, column=1)
-    merged_cell.value = f"Raneen {category_name} {date_str}"
-    merged_cell.font = header_font
-    merged_cell.fill = header_fill
-    merged_cell.alignment = center_align
-
-    # Style header row (Row 2)
-    for cell in ws[2]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-
-    # Style body and set column widths
-    for column in ws.columns:
-        col_letter = get_column_letter(column[0].column)
-        header = column[1].value if len(column) > 1 else None
-
-        if header == "Product URL":
-            # Fixed width (approx 20 chars), left-aligned, shrink to fit
-            ws.column_dimensions[col_letter].width = 20
-            for cell in column[2:]:
-                cell.alignment = Alignment(
-                    horizontal="left",
-                    vertical="center",
-                    wrap_text=False,
-                    shrink_to_fit=True
-                )
-                cell.font = body_font
-                cell.border = border
-        else:
-            # Approximate auto-fit by measuring max length
-            max_length = 0
-            for cell in column[2:]:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length + 6
-
-            for cell in column[2:]:
-                cell.alignment = center_align
-                cell.font = body_font
-                cell.border = border
+# === Excel Styling (Per Sheet) ===
+# Title row "Raneen <category> <date>", header colours, URL column width, auto-fit padding
+SHEET_STYLE = {
+    "title": "Raneen",
+    "header_color": "8B0000",
+    "header_font_color": "FFFFFF",
+    "url_width": 20,
+    "width_padding": 6,
+}
 
 # === Helper Functions ===
+def sheet_name(category):
+    """Excel sheet name for a category (also used by tools/replay-snapshots.py)."""
+    return re.sub(r'[^\w\s-]', '_', category)[:31].strip()
+
 def normalize_price(text):
     if not text:
         return None
@@ -112,113 +119,242 @@ def extract_sku(name):
 def normalize_sku(sku):
     return re.sub(r'[\-_/\\\.\(\)\s]', '', sku).lower() if sku else ""
 
-# === Start Scraping ===
-print("🚀 Starting Raneen Scraper")
-data_by_category = {}
+def make_row(title, old_price, new_price, product_url):
+    product_code = extract_sku(title)
+    return {
+        "Item Name": title,
+        "Old Price": old_price,
+        "New Price": new_price,
+        "Product Code": product_code,
+        "Normalized Code": normalize_sku(product_code),
+        "Product URL": product_url
+    }
 
-for category, url in category_links:
+def prices_from_card(card):
+    """Apply the unified three-case price logic to the raw texts from extract_cards."""
+    if not card["has_price_box"]:
+        return None, None
+    new_price = old_price = None
+    try:
+        # Case 1: Special + Old
+        if card["special"] is not None:
+            new_price = normalize_price(card["special"])
+            if card["old"] is not None:
+                old_price = normalize_price(card["old"])
+        # Case 2: Regular price wrapper
+        elif card["regular"] is not None:
+            new_price = normalize_price(card["regular"])
+        # Case 3: Fallback to raw spans
+        else:
+            if card["current"] is not None:
+                new_price = normalize_price(card["current"])
+            if card["old_raw"] is not None:
+                old_price = normalize_price(card["old_raw"])
+    except Exception:
+        return None, None
+    return new_price, old_price
+
+def rows_from_cards(cards):
+    """Turn raw card dicts (JS or HTML parser) into rows."""
+    data = []
+    for card in cards:
+        if card["title"] is None or not card["url"]:
+            continue
+        new_price, old_price = prices_from_card(card)
+        data.append(make_row(card["title"].strip(), old_price, new_price, card["url"].strip()))
+    return data
+
+def parse_cards_js(driver):
+    """Parse every product card from one execute_script call."""
+    return rows_from_cards(extract_cards(driver, "raneen"))
+
+def parse_cards_structured(driver):
+    """Card rows priced from the page's embedded product data (JSON-LD, Magento price attributes) where present."""
+    doc = parse_document(driver.page_source)
+    data = rows_from_cards(raneen_cards(doc, driver.current_url))
+    found = apply_structured(data, structured_offers(doc, driver.current_url), normalize_sku)
+    print(f"✅ Parsed {len(data)} products, {found} priced from embedded data.")
+    return data
+
+def get_total_product_count(driver):
+    """Largest number in the Magento toolbar ('Items 1-24 of 240'), or None if the page has no toolbar."""
+    text = driver.execute_script(
+        "const el = document.querySelector('#toolbar-amount, .toolbar-amount'); return el ? el.textContent : '';"
+    )
+    numbers = [int(n) for n in re.findall(r"\d+", text or "")]
+    return max(numbers) if numbers else None
+
+# === Scrape One Category ===
+def scrape_category(driver, wait, category, url):
+    """Scroll one category until the card count settles and return its rows."""
     print(f"\n➡️ Scraping Category: {category} | URL: {url}")
     driver.get(url)
     time.sleep(2)
 
-    # Load all products using infinite scroll
-    prev_count = -1
-    same_count_repeats = 0
-    max_repeats = 3
-
-    while same_count_repeats < max_repeats:
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        products = driver.find_elements(By.CSS_SELECTOR, "div.product-item-info")
-        current_count = len(products)
-        print(f"🔍 Products loaded so far: {current_count}")
-        if current_count == prev_count:
-            same_count_repeats += 1
-        else:
-            same_count_repeats = 0
-            prev_count = current_count
-
-    product_cards = driver.find_elements(By.CSS_SELECTOR, "div.product-item-info")
-    print(f"✅ Total products loaded: {len(product_cards)}")
+    # Load all products using infinite scroll (shared engine, stops early once the toolbar total is loaded)
+    harvester = CardHarvester(driver, "raneen") if args.harvest else None
+    if harvester:
+        harvester.harvest()
+    scroll_to_end(
+        driver, "raneen", "div.product-item-info", expected_total=get_total_product_count(driver),
+        on_step=(lambda count: harvester.harvest()) if harvester else None,
+    )
+    # Keep the loaded page for offline re-parsing (--archive)
+    archive.store_page(category, driver)
 
-    data = []
-    for card in product_cards:
-        try:
-            title_el = card.find_element(By.CSS_SELECTOR, "a.product-item-link")
-            title = title_el.text.strip()
-            product_url = title_el.get_attribute("href").strip()
+    if harvester:
+        harvester.harvest(final=True)
+        data = rows_from_cards(harvester.cards)
+        print(f"✅ Parsed {len(data)} products harvested while scrolling.")
+    elif args.extract == "snapshot":
+        print("📸 Queued the loaded page for parsing.")
+        return snapshots.rows([snapshots.submit(driver)], rows_from_cards)
+    elif args.extract == "structured":
+        data = parse_cards_structured(driver)
+    elif args.extract == "js":
+        data = parse_cards_js(driver)
+        print(f"✅ Parsed {len(data)} products in one script call")
+    else:
+        product_cards = driver.find_elements(By.CSS_SELECTOR, "div.product-item-info")
+        print(f"✅ Total products loaded: {len(product_cards)}")
 
-            # Unified Price Logic
+        data = []
+        for card in product_cards:
             try:
-                price_box = card.find_element(By.CSS_SELECTOR, ".price-box.price-final_price")
-                new_price = old_price = None
-
-                # Case 1: Special + Old
-                special_els = price_box.find_elements(By.CSS_SELECTOR, ".special-price .price-wrapper")
-                old_els = price_box.find_elements(By.CSS_SELECTOR, ".old-price .price-wrapper")
-                if special_els:
-                    new_price = normalize_price(special_els[0].text)
-                    if old_els:
-                        old_price = normalize_price(old_els[0].text)
-                else:
-                    # Case 2: Regular price wrapper
-                    reg_els = price_box.find_elements(By.CSS_SELECTOR, ".price-container .price-wrapper")
-                    if reg_els:
-                        new_price = normalize_price(reg_els[0].text)
-                    else:
-                        # Case 3: Fallback to raw spans
-                        curr_els = price_box.find_elements(By.CSS_SELECTOR, ".current-price")
-                        old_els = price_box.find_elements(By.CSS_SELECTOR, ".old-price")
-                        if curr_els:
-                            new_price = normalize_price(curr_els[0].text)
+                title_el = card.find_element(By.CSS_SELECTOR, "a.product-item-link")
+                title = title_el.text.strip()
+                product_url = title_el.get_attribute("href").strip()
+
+                # Unified Price Logic
+                try:
+                    price_box = card.find_element(By.CSS_SELECTOR, ".price-box.price-final_price")
+                    new_price = old_price = None
+
+                    # Case 1: Special + Old
+                    special_els = price_box.find_elements(By.CSS_SELECTOR, ".special-price .price-wrapper")
+                    old_els = price_box.find_elements(By.CSS_SELECTOR, ".old-price .price-wrapper")
+                    if special_els:
+                        new_price = normalize_price(special_els[0].text)
                         if old_els:
                             old_price = normalize_price(old_els[0].text)
-            except:
-                new_price = None
-                old_price = None
-
-            # SKU Extraction
-            product_code = extract_sku(title)
-            normalized_code = normalize_sku(product_code)
-
-            data.append({
-                "Item Name": title,
-                "Old Price": old_price,
-                "New Price": new_price,
-                "Product Code": product_code,
-                "Normalized Code": normalized_code,
-                "Product URL": product_url
-            })
-
-        except Exception as e:
-            print(f"⚠️ Skipping product: {e}")
-
-    # Save data for this category
+                    else:
+                        # Case 2: Regular price wrapper
+                        reg_els = price_box.find_elements(By.CSS_SELECTOR, ".price-container .price-wrapper")
+                        if reg_els:
+                            new_price = normalize_price(reg_els[0].text)
+                        else:
+                            # Case 3: Fallback to raw spans
+                            curr_els = price_box.find_elements(By.CSS_SELECTOR, ".current-price")
+                            old_els = price_box.find_elements(By.CSS_SELECTOR, ".old-price")
+                            if curr_els:
+                                new_price = normalize_price(curr_els[0].text)
+                            if old_els:
+                                old_price = normalize_price(old_els[0].text)
+                except:
+                    new_price = None
+                    old_price = None
+
+                data.append(make_row(title, old_price, new_price, product_url))
+
+            except Exception as e:
+                print(f"⚠️ Skipping product: {e}")
+
+    return data
+
+# === Scrape One Category Over HTTP ===
+def scrape_category_http(session, category, url):
+    """Download the listing in product_list_limit-sized pages, several at a time, and return its rows."""
+    print(f"\n➡️ Scraping Category: {category}")
+    print(f"🔗 {url}")
+
+    offers = {}  # embedded prices of every page, for --extract structured
+
+    def parse_page(html, page_url):
+        doc = parse_document(html)
+        if args.extract == "structured":
+            offers.update(structured_offers(doc, page_url))
+        return raneen_cards(doc, page_url), magento_total_count(doc)
+
+    try:
+        cards = fetch_listing(
+            session, url, parse_page,
+            params={"product_list_limit": args.page_size},
+            max_workers=args.http_workers,
+            on_page=lambda page, html, page_url: archive.store(category, page, html, page_url)
+        )
+    except Exception as e:
+        print(f"❌ Could not download listing: {e}")
+        return []
+    data = rows_from_cards(cards)
+    if args.extract == "structured":
+        found = apply_structured(data, offers, normalize_sku)
+        print(f"✅ Parsed {len(data)} products, {found} priced from embedded data.")
+    else:
+        print(f"✅ Parsed {len(data)} products.")
+    return data
+
+# === Save One Category ===
+def save_category(category, data, partial):
+    """Checkpoints one category's rows and reports the count."""
     if data:
-        data_by_category[category] = data
-        print(f"📌 Collected {len(data)} products for '{category}'")
+        checkpoint.save(category, data, partial=partial)
+        saved_categories.append(category)
+        print(f"📌 Collected {len(data)} products for '{category}'{' (partial)' if partial else ''}")
     else:
         print(f"⚠️ No products collected for '{category}'")
 
+# === Start Scraping ===
+print("🚀 Starting Raneen Scraper")
+saved_categories = []  # rows live in the checkpoint files, not in memory
+pending = deque()  # (category, rows or PendingRows, partial) not saved yet
+recycler = DriverRecycler(create_driver, args.recycle_every, args.max_heap_mb, args.max_browser_mb)
+
+for category, url in category_links:
+    if checkpoint.has(category):
+        save_in_order(pending, save_category, flush=True)  # keep the sheet order of the targets file
+        saved_categories.append(category)
+        print(f"⏭️ Resumed {checkpoint.count(category)} products for '{category}' from checkpoint")
+        continue
+
+    deadline = start_category_deadline(args.category_timeout)
+    if args.fetch == "http":
+        data = scrape_category_http(session, category, url)
+    else:
+        try:
+            with polite_request(url, kind="browser", timed=False) as slot:
+                data = scrape_with_blocking(
+                    driver, "raneen", args, lambda: scrape_category(driver, wait, category, url)
+                )
+                if not data:
+                    slot.fail()
+        except TimeoutException:
+            print(f"⏱️ Page load for '{category}' timed out. Moving on.")
+            data = []
+
+    # Save data for this category (with --extract snapshot, once its pages are parsed)
+    pending.append((category, data, deadline.partial))
+    save_in_order(pending, save_category)
+
+    # Fresh Chrome once the category count or memory limits are reached
+    if driver:
+        driver = recycler.check(driver)
+        wait = WebDriverWait(driver, 10)
+
+# Wait for categories whose snapshots are still being parsed
+save_in_order(pending, save_category, flush=True)
+if snapshots:
+    snapshots.shutdown()
+
 # === Save All Data to Single Workbook ===
-if data_by_category:
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        for category, data in data_by_category.items():
-            safe_sheet_name = re.sub(r'[^\w\s-]', '_', category)[:31].strip()
-            df_out = pd.DataFrame(data)[[
-                "Item Name",
-                "Old Price",
-                "New Price",
-                "Product Code",
-                "Normalized Code",
-                "Product URL"
-            ]]
-            df_out.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-            style_sheet(writer.sheets[safe_sheet_name], category, datetime.now().strftime("%y-%m-%d"))
+if saved_categories:
+    # Clean sheet names (remove invalid chars, limit to 31)
+    sheets = [(category, sheet_name(category)) for category in saved_categories]
+    write_workbook(output_file, sheets, checkpoint, SHEET_STYLE, datetime.now().strftime("%y-%m-%d"))
     print(f"📁 Saved all categories to: {output_file}")
 else:
     print("⚠️ No data collected across all categories.")
 
 # === Cleanup ===
-driver.quit()
+if driver:
+    release_driver(driver)
 print("🏁 Raneen scraping completed.")
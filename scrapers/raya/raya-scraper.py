@@ -1,4 +1,3 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -8,27 +7,80 @@ import time
 import pandas as pd
 import os
 import re
+import sys
+import argparse
+from urllib.parse import urljoin
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from collections import deque
+
+# === Shared Helpers ===
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from common.cli import add_common_arguments
+from common.extractors import extract_cards, CardHarvester
+from common.browser import start_driver, release_driver
+from common.recycle import DriverRecycler
+from common.checkpoint import CategoryCheckpoint
+from common.fingerprint import FingerprintStore, listing_fingerprint
+from common.workbook import write_workbook
+from common.snapshots import SnapshotParser, save_in_order
+from common.archive import SnapshotArchive
+from common.scroll import count_cards, scroll_to_end
+from common.blocking import enable_network_log, setup_blocking, scrape_with_blocking
+from common.deadline import start_category_deadline
+from common.politeness import polite_request
+from common.xhr_capture import JsonResponseCollector, next_data_payload, find_products, number, NAME_KEYS, URL_KEYS, SLUG_KEYS
+from common.html_parsers import parse_document, raya_cards
+from common.structured import structured_offers, apply_structured, offers_from_rows
+from common.sitemap import url_key
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Raya category scraper")
+add_common_arguments(parser)
+parser.add_argument("--scroll-wait", choices=["observer", "sleep"], default="observer",
+                    help="After each scroll: 'observer' returns as soon as new cards appear, 'sleep' waits a fixed 3 s")
+parser.add_argument("--quiet-period", type=float,
+                    help="Fix the seconds without DOM changes before an observer wait gives up (default: adapts to load latency)")
+parser.add_argument("--source", choices=["dom", "xhr"], default="dom",
+                    help="'xhr' builds rows from the JSON API responses captured while scrolling (falls back to cards if incomplete)")
+parser.add_argument("--xhr-pattern", default=r"/api/|graphql|/products",
+                    help="Regex for the URLs of JSON responses to capture in --source xhr mode")
+parser.add_argument("--full", action="store_true",
+                    help="Scrape every category even if its listing fingerprint matches the last run")
+parser.add_argument("--harvest", action="store_true",
+                    help="Read new cards after every scroll step, deduplicated by URL, instead of parsing the whole grid at the end")
+args = parser.parse_args()
+if args.source == "xhr" and (args.check_blocking or args.block_resources):
+    # Each reader clears the log, so the other would miss entries (and undercount bytes)
+    parser.error("--source xhr and --block-resources / --check-blocking all read Chrome's network log; run them separately")
 
 # === Chrome Setup ===
-options = Options()
-# options.add_argument('--headless=new')  # Uncomment for headless mode
-options.add_argument('--disable-gpu')
-options.add_argument('--window-size=1920,1080')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_experimental_option('excludeSwitches', ['enable-automation'])
-options.add_experimental_option('useAutomationExtension', False)
-driver = webdriver.Chrome(options=options)
-driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-    "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-})
+def create_driver():
+    """Start a Chrome driver with the Raya options and user agent override."""
+    options = Options()
+    # options.add_argument('--headless=new')  # Uncomment for headless mode
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    if args.block_resources or args.check_blocking or args.source == "xhr":
+        enable_network_log(options)
+    driver = start_driver(options, "raya", attach=args.attach,
+                          persistent_profile=args.persistent_profile, cache_mb=args.cache_mb)
+    if args.category_timeout:
+        driver.set_page_load_timeout(args.category_timeout)
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+        "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    })
+    setup_blocking(driver, "raya", args)
+    return driver
+
+driver = create_driver()
 wait = WebDriverWait(driver, 10)
+collector = JsonResponseCollector(args.xhr_pattern) if args.source == "xhr" else None
 
 # === Input Excel ===
-input_excel = "raya-targets.xlsx"
+input_excel = args.targets or "raya-targets.xlsx"
 df = pd.read_excel(input_excel, header=1)
 df.columns = df.columns.str.strip()
 df = df.dropna(subset=["Category", "URL"])
@@ -41,64 +93,26 @@ os.makedirs(output_dir, exist_ok=True)
 # === Final Output File (One Workbook, Multiple Sheets) ===
 timestamp = datetime.now().strftime("%Y-%m-%d")
 output_file = os.path.join(output_dir, f"raya-all-categories_{timestamp}.xlsx")
+checkpoint = CategoryCheckpoint(output_dir, timestamp, resume=args.resume)
+archive = SnapshotArchive(output_dir, timestamp, enabled=args.archive)
+fingerprints = FingerprintStore(output_dir, timestamp, enabled=not (args.full or args.check_blocking), archive=archive)
+snapshots = SnapshotParser("raya_cards", args.parse_workers, wait=args.check_blocking) if args.extract == "snapshot" else None
+
+# === Excel Styling (Per Sheet) ===
+# Title row "RAYA <category> <date>", header colours, URL column width, auto-fit padding
+SHEET_STYLE = {
+    "title": "RAYA",
+    "header_color": "00008B",
+    "header_font_color": "FFFFFF",
+    "url_width": 30,
+    "width_padding": 6,
+}
 
-# === Excel Styling Function (Per Sheet) ===
-def style_sheet(ws, category_name, date_str):
-    """Apply consistent styling: blue header, centered, URL column 30 width, no wrap."""
-    header_fill = PatternFill(start_color="00008B", end_color="00008B", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    body_font = Font(color="000000")
-    center_align = Alignment(horizontal="center", vertical="center")
-    border = Border(bottom=Side(border_style="thin", color="000000"))
-
-    # Insert and merge header row (Row 1)
-    ws.insert_rows(1)
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=6)
-    merged_cell = ws.cell(row=1, column=1)
-    merged_cell.value = f"RAYA {category_name} {date_str}"
-    merged_cell.font = header_font
-    merged_cell.fill = header_fill
-    merged_cell.alignment = center_align
-
-    # Style header row (Row 2)
-    for cell in ws[2]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-
-    # Style body and set column widths
-    for column in ws.columns:
-        col_letter = get_column_letter(column[0].column)
-        header = column[1].value if len(column) > 1 else None
-
-        if header == "Product URL":
-            # Fixed width, left-aligned, no wrap, shrink to fit
-            ws.column_dimensions[col_letter].width = 30
-            for cell in column[2:]:
-                cell.alignment = Alignment(
-                    horizontal="left",
-                    vertical="center",
-                    wrap_text=False,
-                    shrink_to_fit=True  # Changed to True to match Option 1
-                )
-                cell.font = body_font
-                cell.border = border
-        else:
-            # Auto width for other columns
-            max_length = 0
-            for cell in column[2:]:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length + 6
-
-            # Center-align non-URL cells
-            for cell in column[2:]:
-                cell.alignment = center_align
-                cell.font = body_font
-                cell.border = border
-                
 # === Helper Functions ===
+def sheet_name(category):
+    """Excel sheet name for a category (also used by tools/replay-snapshots.py)."""
+    return re.sub(r'[\/\\*?\[\]:]', '_', category)[:31]
+
 def normalize_price(text):
     """Extracts integer from price text (removes commas)."""
     if not text:
@@ -123,6 +137,82 @@ def normalize_sku(sku):
     """Removes separators and converts to lowercase."""
     return re.sub(r'[^a-zA-Z0-9]', '', sku).lower() if sku else ""
 
+def make_row(title, old_price, new_price, product_url):
+    """Builds one output row, deriving the product code from the title."""
+    product_code = extract_sku(title)
+    return {
+        "Item Name": title,
+        "Old Price": old_price,
+        "New Price": new_price,
+        "Product Code": product_code,
+        "Normalized Code": normalize_sku(product_code),
+        "Product URL": product_url
+    }
+
+def rows_from_cards(cards):
+    """Turns raw card dicts (JS extractor or harvester) into rows."""
+    data = []
+    for card in cards:
+        if card["title"] is None or not card["url"]:
+            print("⚠️ Skipped product: missing title or URL")
+            continue
+        new_price = normalize_price(card["special"].strip()) if card["special"] is not None else None
+        old_price = normalize_price(card["old"].strip()) if card["old"] is not None else None
+        product_url = "https://www.rayashop.com" + card["url"].strip()
+        data.append(make_row(card["title"].strip(), old_price, new_price, product_url))
+    return data
+
+def parse_cards_js(driver):
+    """Parses every product card from one execute_script call."""
+    return rows_from_cards(extract_cards(driver, "raya"))
+
+def parse_cards_structured(driver):
+    """Card rows priced from __NEXT_DATA__ and JSON-LD where the page embeds them."""
+    doc = parse_document(driver.page_source)
+    data = rows_from_cards(raya_cards(doc, driver.current_url))
+    offers = offers_from_rows(rows_from_payloads([next_data_payload(driver)]))
+    offers.update(structured_offers(doc, driver.current_url))
+    found = apply_structured(data, offers, normalize_sku)
+    print(f"✅ Parsed {len(data)} products, {found} priced from embedded data.")
+    return data
+
+# === Rows From Captured JSON ===
+def product_prices(item):
+    """(new, old) from a product record; handles flat fields and Magento-style price_range."""
+    minimum = (item.get("price_range") or {}).get("minimum_price") or {}
+    new_price = (number(minimum.get("final_price")) or number(item.get("special_price"))
+                 or number(item.get("final_price")) or number(item.get("price")))
+    old_price = (number(minimum.get("regular_price")) or number(item.get("regular_price"))
+                 or number(item.get("old_price")) or number(item.get("original_price")))
+    # The card only shows a struck-through price when there is a discount
+    if old_price is not None and (new_price is None or old_price <= new_price):
+        old_price = None
+    return new_price, old_price
+
+def product_url(item):
+    for key in URL_KEYS:
+        if isinstance(item.get(key), str) and item[key]:
+            return urljoin("https://www.rayashop.com/ar/", item[key])
+    slug = next((item[key] for key in SLUG_KEYS if isinstance(item.get(key), str) and item[key]), None)
+    return f"https://www.rayashop.com/ar/{slug}" if slug else None
+
+def rows_from_payloads(payloads):
+    """Builds rows from every product record in the captured payloads, deduplicated by URL."""
+    data, seen_urls = [], set()
+    for payload in payloads:
+        if payload is None:
+            continue
+        for item in find_products(payload):
+            title = next(item[key] for key in NAME_KEYS if isinstance(item.get(key), str)).strip()
+            url = product_url(item)
+            if not title or not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            new_price, old_price = product_prices(item)
+            # Same Product URL format as the card rows (rows_from_cards), so runs and sources compare equal
+            data.append(make_row(title, old_price, new_price, "https://www.rayashop.com" + url))
+    return data
+
 # === Get Total Product Count (Dual Verification) ===
 def get_total_product_count(driver):
     """
@@ -154,13 +244,13 @@ def get_total_product_count(driver):
 
     return max(counts) if counts else None
 
-# === Start Scraping ===
-print("🚀 Starting Raya Scraper")
-data_by_category = {}
-
-for category, url in category_links:
+# === Scrape One Category ===
+def scrape_category(driver, wait, category, url):
+    """Scrolls one category until all expected products are loaded and returns its rows (empty list on failure)."""
     print(f"\n➡️ Scraping Category: {category}")
     print(f"🔗 URL: {url}")
+    if collector:
+        collector.reset(driver)
     driver.get(url)
     time.sleep(3)
 
@@ -170,133 +260,177 @@ for category, url in category_links:
         print("✅ Product grid loaded")
     except TimeoutException:
         print("❌ Timeout: Product grid not found. Skipping category.")
-        continue
+        return []
 
     # Get expected total count (dual verification)
     total_count = get_total_product_count(driver)
     if not total_count:
         print("❌ Could not determine total product count. Skipping category.")
-        continue
+        return []
     print(f"📊 Expected products: {total_count}")
 
-    # Infinite Scroll with Product Count Verification
-    seen_count = 0
-    max_wait_attempts = 10
-    attempt = 0
-
-    while attempt < max_wait_attempts:
-        # Scroll to bottom
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(3)  # Allow time for AJAX load
-
-        # Find current number of product cards
-        current_cards = driver.find_elements(By.CSS_SELECTOR, "article.ProductCard")
-        current_count = len(current_cards)
-
-        print(f"🔄 Loaded {current_count} / {total_count} products...")
-
-        # ✅ If we've reached or exceeded expected count, stop
-        if current_count >= total_count:
-            print(f"✅ Loaded all {current_count} expected products.")
-            break
-
-        # ⚠️ If no new products loaded in this iteration
-        if current_count == seen_count:
-            attempt += 1
-            print(f"⚠️ No new products. Stagnant attempt {attempt}/{max_wait_attempts}")
-        else:
-            attempt = 0  # Reset if new products loaded
-
-        seen_count = current_count
-
-        # 🛑 Safety break
-        if attempt >= max_wait_attempts:
-            print("🛑 Max wait attempts reached. May have missed some products.")
-            break
-    
+    # Reuse the last run's rows if the count and first page are unchanged
+    fingerprint = listing_fingerprint(total_count, parse_cards_js(driver))
+    previous = fingerprints.previous_rows(category, fingerprint, total_count)
+    if previous is not None:
+        print(f"♻️ Listing unchanged since the last run, reusing its {len(previous)} products")
+        return previous
+
+    # Drain captured JSON and harvest new cards after every scroll step
+    harvester = CardHarvester(driver, "raya") if args.harvest else None
+    if harvester:
+        harvester.harvest()
+
+    def on_step(count):
+        if collector:
+            collector.drain(driver)
+        return harvester.harvest() if harvester else None
+
+    # Infinite scroll until the expected count is loaded (shared engine, Raya cadence)
+    scroll_to_end(
+        driver, "raya", "article.ProductCard", expected_total=total_count,
+        fixed_wait=3 if args.scroll_wait == "sleep" else None,
+        quiet_period=args.quiet_period,
+        on_step=on_step,
+    )
+
     # Final verification
-    final_cards = driver.find_elements(By.CSS_SELECTOR, "article.ProductCard")
-    print(f"✅ Final product count: {len(final_cards)}")
-    if len(final_cards) < total_count:
-        print(f"⚠️ Warning: Only {len(final_cards)} out of {total_count} products loaded.")
+    if harvester:
+        harvester.harvest(final=True)
+        final_count = len(harvester.cards)
+    else:
+        final_count = count_cards(driver, "article.ProductCard")
+    print(f"✅ Final product count: {final_count}")
+    if final_count < total_count:
+        print(f"⚠️ Warning: Only {final_count} out of {total_count} products loaded.")
         
+    # Keep the loaded page for offline re-parsing (--archive)
+    archive.store_page(category, driver)
+
+    # Rows from captured API responses
+    if collector:
+        payloads = collector.drain(driver) + [next_data_payload(driver)]
+        # Only records of products that are in the grid count (not recommendations, facets or the cart)
+        grid_cards = harvester.cards if harvester else extract_cards(driver, "raya")
+        grid_keys = {url_key(card["url"]) for card in grid_cards if card.get("url")}
+        data = [row for row in rows_from_payloads(payloads) if url_key(row["Product URL"]) in grid_keys]
+        if data and len(data) >= max(final_count, len(grid_keys)):
+            print(f"✅ Built {len(data)} rows from {len(payloads) - 1} captured JSON responses.")
+            return data
+        print(f"⚠️ Only {len(data)} of {final_count} grid products found in captured JSON. Parsing cards instead.")
+
     # Extract product cards
-    product_cards = driver.find_elements(By.CSS_SELECTOR, "article.ProductCard")
-    print(f"✅ Found {len(product_cards)} product cards.")
+    if harvester:
+        data = rows_from_cards(harvester.cards)
+        print(f"✅ Parsed {len(data)} product cards harvested while scrolling.")
+    elif args.extract == "snapshot":
+        print("📸 Queued the loaded page for parsing.")
+        return snapshots.rows([snapshots.submit(driver)], rows_from_cards)
+    elif args.extract == "structured":
+        data = parse_cards_structured(driver)
+    elif args.extract == "js":
+        data = parse_cards_js(driver)
+        print(f"✅ Parsed {len(data)} product cards in one script call.")
+    else:
+        product_cards = driver.find_elements(By.CSS_SELECTOR, "article.ProductCard")
+        print(f"✅ Found {len(product_cards)} product cards.")
 
-    data = []
-    for card in product_cards:
-        try:
-            # Title & URL
+        data = []
+        for card in product_cards:
             try:
-                title_link = card.find_element(By.CSS_SELECTOR, "a.flex.flex-col[href]")
-                title_el = title_link.find_element(By.CSS_SELECTOR, "p.name.clamp-text")
-                title = title_el.text.strip()
-                product_url = "https://www.rayashop.com" + title_link.get_attribute("href").strip()
+                # Title & URL
+                try:
+                    title_link = card.find_element(By.CSS_SELECTOR, "a.flex.flex-col[href]")
+                    title_el = title_link.find_element(By.CSS_SELECTOR, "p.name.clamp-text")
+                    title = title_el.text.strip()
+                    product_url = "https://www.rayashop.com" + title_link.get_attribute("href").strip()
+                except Exception as e:
+                    print("⚠️ Skipped product: missing title or URL")
+                    continue
+
+                # New Price
+                try:
+                    new_price_el = card.find_element(By.CSS_SELECTOR, "span.text-primary-500:not(.line-through)")
+                    new_price_text = new_price_el.text.strip()
+                    new_price = normalize_price(new_price_text)
+                except:
+                    new_price = None
+
+                # Old Price
+                try:
+                    old_price_el = card.find_element(By.CSS_SELECTOR, "span.line-through")
+                    old_price_text = old_price_el.text.strip()
+                    old_price = normalize_price(old_price_text)
+                except:
+                    old_price = None
+
+                data.append(make_row(title, old_price, new_price, product_url))
+
             except Exception as e:
-                print("⚠️ Skipped product: missing title or URL")
+                print(f"⚠️ Skipped product: {e}")
                 continue
 
-            # New Price
-            try:
-                new_price_el = card.find_element(By.CSS_SELECTOR, "span.text-primary-500:not(.line-through)")
-                new_price_text = new_price_el.text.strip()
-                new_price = normalize_price(new_price_text)
-            except:
-                new_price = None
-
-            # Old Price
-            try:
-                old_price_el = card.find_element(By.CSS_SELECTOR, "span.line-through")
-                old_price_text = old_price_el.text.strip()
-                old_price = normalize_price(old_price_text)
-            except:
-                old_price = None
-
-            # SKU Extraction
-            product_code = extract_sku(title)
-            normalized_code = normalize_sku(product_code)
-
-            data.append({
-                "Item Name": title,
-                "Old Price": old_price,
-                "New Price": new_price,
-                "Product Code": product_code,
-                "Normalized Code": normalized_code,
-                "Product URL": product_url
-            })
-
-        except Exception as e:
-            print(f"⚠️ Skipped product: {e}")
-            continue
+    return data
 
-    # Save data for this category
+# === Save One Category ===
+def save_category(category, data, partial):
+    """Checkpoints one category's rows and reports the count."""
     if data:
-        data_by_category[category] = data
-        print(f"📌 Collected {len(data)} products for '{category}'")
+        checkpoint.save(category, data, partial=partial)
+        if not partial:
+            fingerprints.record(category, len(data))
+        saved_categories.append(category)
+        print(f"📌 Collected {len(data)} products for '{category}'{' (partial)' if partial else ''}")
     else:
         print(f"⚠️ No products collected for '{category}'")
 
+# === Start Scraping ===
+print("🚀 Starting Raya Scraper")
+saved_categories = []  # rows live in the checkpoint files, not in memory
+pending = deque()  # (category, rows or PendingRows, partial) not saved yet
+recycler = DriverRecycler(create_driver, args.recycle_every, args.max_heap_mb, args.max_browser_mb)
+
+for category, url in category_links:
+    if checkpoint.has(category):
+        save_in_order(pending, save_category, flush=True)  # keep the sheet order of the targets file
+        saved_categories.append(category)
+        print(f"⏭️ Resumed {checkpoint.count(category)} products for '{category}' from checkpoint")
+        continue
+
+    deadline = start_category_deadline(args.category_timeout)
+    try:
+        with polite_request(url, kind="browser", timed=False) as slot:
+            data = scrape_with_blocking(
+                driver, "raya", args, lambda: scrape_category(driver, wait, category, url)
+            )
+            if not data:
+                slot.fail()
+    except TimeoutException:
+        print(f"⏱️ Page load for '{category}' timed out. Moving on.")
+        data = []
+
+    # Save data for this category (with --extract snapshot, once its pages are parsed)
+    pending.append((category, data, deadline.partial))
+    save_in_order(pending, save_category)
+
+    # Fresh Chrome once the category count or memory limits are reached
+    driver = recycler.check(driver)
+    wait = WebDriverWait(driver, 10)
+
+# Wait for categories whose snapshots are still being parsed
+save_in_order(pending, save_category, flush=True)
+if snapshots:
+    snapshots.shutdown()
+
 # === Save All Data to Single Workbook ===
-if data_by_category:
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        for category, data in data_by_category.items():
-            safe_sheet_name = re.sub(r'[\/\\*?\[\]:]', '_', category)[:31]
-            df_out = pd.DataFrame(data)
-            df_out = df_out[[
-                "Item Name",
-                "Old Price",
-                "New Price",
-                "Product Code",
-                "Normalized Code",
-                "Product URL"
-            ]]
-            df_out.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-            style_sheet(writer.sheets[safe_sheet_name], category, datetime.now().strftime("%y-%m-%d"))
+if saved_categories:
+    # Clean sheet names (remove invalid chars, limit to 31)
+    sheets = [(category, sheet_name(category)) for category in saved_categories]
+    write_workbook(output_file, sheets, checkpoint, SHEET_STYLE, datetime.now().strftime("%y-%m-%d"))
     print(f"📁 Saved all categories to: {output_file}")
 else:
     print("⚠️ No data collected across all categories.")
 
 # === Cleanup ===
-driver.quit()
+release_driver(driver)
 print("🏁 Raya scraping completed.")
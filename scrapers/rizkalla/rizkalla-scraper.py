@@ -1,4 +1,3 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -8,27 +7,84 @@ import time
 import pandas as pd
 import os
 import re
+import sys
+import argparse
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from collections import deque
+
+# === Shared Helpers ===
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+from common.cli import add_common_arguments
+from common.extractors import extract_cards
+from common.browser import start_driver, release_driver
+from common.recycle import DriverRecycler
+from common.checkpoint import CategoryCheckpoint
+from common.fingerprint import FingerprintStore, listing_fingerprint
+from common.workbook import write_workbook
+from common.snapshots import SnapshotParser, save_in_order
+from common.archive import SnapshotArchive
+from common.blocking import enable_network_log, setup_blocking, apply_blocking_to_tab, scrape_with_blocking
+from common.deadline import start_category_deadline, deadline_expired, mark_incomplete
+from common.politeness import polite_request, report_empty_page
+from common.http_fetch import make_session, fetch_html, fetch_all, with_query
+from common.html_parsers import parse_document, rizkalla_total_count, rizkalla_cards
+from common.structured import structured_offers, apply_structured
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Rizkalla category scraper")
+add_common_arguments(parser)
+parser.add_argument("--fetch", choices=["browser", "http"], default="browser",
+                    help="'browser' clicks through pages in Chrome, 'http' downloads all ?page=N listings concurrently without a browser")
+parser.add_argument("--tabs", type=int, default=1,
+                    help="Browser mode: load ?page=N in this many tabs at once instead of clicking through pages (default: 1)")
+parser.add_argument("--http-workers", type=int, default=8,
+                    help="Concurrent page downloads per category in --fetch http mode (default: 8)")
+parser.add_argument("--full", action="store_true",
+                    help="Scrape every category even if its listing fingerprint matches the last run")
+args = parser.parse_args()
 
 # === Chrome Setup ===
-options = Options()
-# options.add_argument('--headless=new')  # Uncomment for headless mode
-options.add_argument('--disable-gpu')
-options.add_argument('--window-size=1920,1080')
-options.add_argument('--disable-blink-features=AutomationControlled')
-options.add_experimental_option('excludeSwitches', ['enable-automation'])
-options.add_experimental_option('useAutomationExtension', False)
-driver = webdriver.Chrome(options=options)
-driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-    "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-})
-wait = WebDriverWait(driver, 10)
+def create_driver():
+    """Start a Chrome driver with the Rizkalla options and user agent override."""
+    options = Options()
+    # options.add_argument('--headless=new')  # Uncomment for headless mode
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    if args.block_resources or args.check_blocking:
+        enable_network_log(options)
+    if args.tabs > 1:
+        # Tabs are navigated back to back; "normal" would make each wait for the previous load
+        options.page_load_strategy = "none"
+    driver = start_driver(options, "rizkalla", attach=args.attach,
+                          persistent_profile=args.persistent_profile, cache_mb=args.cache_mb)
+    if args.category_timeout:
+        driver.set_page_load_timeout(args.category_timeout)
+    configure_tab(driver)
+    setup_blocking(driver, "rizkalla", args)
+    return driver
+
+def configure_tab(driver):
+    """
+    User agent override and resource blocking are per tab in CDP, so every new tab needs
+    them; a tab gets whatever blocking the driver has right now (--check-blocking toggles it).
+    """
+    driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+        "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    })
+    apply_blocking_to_tab(driver)
+
+driver = wait = session = None
+if args.fetch == "browser":
+    driver = create_driver()
+    wait = WebDriverWait(driver, 10)
+else:
+    session = make_session(pool_size=args.http_workers)
 
 # === Input Excel ===
-input_excel = "rizkalla-targets.xlsx"
+input_excel = args.targets or "rizkalla-targets.xlsx"
 df = pd.read_excel(input_excel, header=1)
 df.columns = df.columns.str.strip()
 df = df.dropna(subset=["Category", "URL"])
@@ -41,64 +97,26 @@ os.makedirs(output_dir, exist_ok=True)
 # === Final Output File (One Workbook) ===
 timestamp = datetime.now().strftime("%Y-%m-%d")
 output_file = os.path.join(output_dir, f"rizkalla-all-categories_{timestamp}.xlsx")
+checkpoint = CategoryCheckpoint(output_dir, timestamp, resume=args.resume)
+archive = SnapshotArchive(output_dir, timestamp, enabled=args.archive)
+fingerprints = FingerprintStore(output_dir, timestamp, enabled=not (args.full or args.check_blocking), archive=archive)
+snapshots = SnapshotParser("rizkalla_cards", args.parse_workers, wait=args.check_blocking) if args.extract == "snapshot" else None
+
+# === Excel Styling (Per Sheet) ===
+# Title row "Rizkalla <category> <date>", header colours, URL column width, auto-fit padding
+SHEET_STYLE = {
+    "title": "Rizkalla",
+    "header_color": "191970",
+    "header_font_color": "FFFFFF",
+    "url_width": 30,
+    "width_padding": 6,
+}
 
-# === Excel Styling Function (Per Sheet) ===
-def style_sheet(ws, category_name, date_str):
-    """Apply consistent styling: black header, centered, URL column 30 width, no wrap."""
-    header_fill = PatternFill(start_color="191970", end_color="191970", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    body_font = Font(color="000000")
-    center_align = Alignment(horizontal="center", vertical="center")
-    border = Border(bottom=Side(border_style="thin", color="000000"))
-
-    # Insert and merge header row (Row 1)
-    ws.insert_rows(1)
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=6)
-    merged_cell = ws.cell(row=1, column=1)
-    merged_cell.value = f"Rizkalla {category_name} {date_str}"
-    merged_cell.font = header_font
-    merged_cell.fill = header_fill
-    merged_cell.alignment = center_align
-
-    # Style header row (Row 2)
-    for cell in ws[2]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-
-    # Style body and set column widths
-    for column in ws.columns:
-        col_letter = get_column_letter(column[0].column)
-        header = column[1].value if len(column) > 1 else None
-
-        if header == "Product URL":
-            # Fixed width, left-aligned, no wrap, shrink to fit
-            ws.column_dimensions[col_letter].width = 30
-            for cell in column[2:]:
-                cell.alignment = Alignment(
-                    horizontal="left",
-                    vertical="center",
-                    wrap_text=False,
-                    shrink_to_fit=True  # Changed to True to match Option 1
-                )
-                cell.font = body_font
-                cell.border = border
-        else:
-            # Auto width for other columns
-            max_length = 0
-            for cell in column[2:]:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col_letter].width = max_length + 6
-
-            # Center-align non-URL cells
-            for cell in column[2:]:
-                cell.alignment = center_align
-                cell.font = body_font
-                cell.border = border
-                
 # === Helper Functions ===
+def sheet_name(category):
+    """Excel sheet name for a category (also used by tools/replay-snapshots.py)."""
+    return re.sub(r'[^\w\s-]', '_', category)[:31].strip()
+
 def normalize_price(text):
     """Extracts integer from price text."""
     if not text:
@@ -126,9 +144,24 @@ def normalize_sku(sku):
     """Removes separators and converts to lowercase."""
     return re.sub(r'[^a-zA-Z0-9]', '', sku).lower() if sku else ""
 
+def make_row(title, old_price, new_price, product_url):
+    """Builds one output row, deriving the product code from the title."""
+    product_code = extract_sku(title)
+    return {
+        "Item Name": title,
+        "Old Price": old_price,
+        "New Price": new_price,
+        "Product Code": product_code,
+        "Normalized Code": normalize_sku(product_code),
+        "Product URL": product_url
+    }
+
 # === Detect Page Type ===
+def is_search_url(url):
+    return 'search' in url.lower() or 'q=' in url.lower()
+
 def is_search_page(driver):
-    return 'search' in driver.current_url.lower() or 'q=' in driver.current_url.lower()
+    return is_search_url(driver.current_url)
 
 # === Extract Total Product Count (Fallback Logic) ===
 def get_total_product_count(driver):
@@ -152,20 +185,120 @@ def get_total_product_count(driver):
     return max(counts) if counts else None
 
 # === Get Product Cards Based on Page Type ===
+SEARCH_CARD_SELECTOR = ".search-results_inner > .product-product-grid > product-card"
+CATEGORY_CARD_SELECTOR = "div#main-collection-product-grid > product-card"
+
+def get_card_selector(driver):
+    return SEARCH_CARD_SELECTOR if is_search_page(driver) else CATEGORY_CARD_SELECTOR
+
 def get_product_cards(driver):
-    if is_search_page(driver):
-        return driver.find_elements(By.CSS_SELECTOR, ".search-results_inner > .product-product-grid > product-card")
-    else:
-        return driver.find_elements(By.CSS_SELECTOR, "div#main-collection-product-grid > product-card")
+    return driver.find_elements(By.CSS_SELECTOR, get_card_selector(driver))
+
+def rows_from_cards(cards):
+    """Turns raw card dicts (JS or HTML parser) into rows; cards without title, URL or prices are skipped."""
+    page_data = []
+    for card in cards:
+        if card["title"] is None or not card["url"] or not card["has_price_box"]:
+            continue
+        page_data.append(make_row(
+            card["title"].strip(),
+            normalize_price(card["old"]),
+            normalize_price(card["special"]),
+            card["url"].strip()
+        ))
+    return page_data
+
+def parse_cards_js(driver):
+    """Parses every product card on the current page from one execute_script call."""
+    return rows_from_cards(extract_cards(driver, "rizkalla", get_card_selector(driver)))
+
+def parse_cards_structured(driver):
+    """Card rows priced from the page's embedded product data (JSON-LD, Magento price attributes) where present."""
+    doc = parse_document(driver.page_source)
+    data = rows_from_cards(rizkalla_cards(doc, driver.current_url, search_mode=is_search_page(driver)))
+    found = apply_structured(data, structured_offers(doc, driver.current_url), normalize_sku)
+    print(f"✅ Parsed {len(data)} products, {found} priced from embedded data.")
+    return data
+
+def parse_cards_dom(driver, page):
+    """Reads every product card on the current page over WebDriver, one element at a time."""
+    product_cards = get_product_cards(driver)
+    print(f"✅ Found {len(product_cards)} product cards on page {page}.")
+
+    page_data = []
+    for card in product_cards:
+        try:
+            title_el = card.find_element(By.CSS_SELECTOR, "section > header > div.product-card_vendor-title > h3 > a")
+            title = title_el.text.strip()
+            product_url = title_el.get_attribute("href").strip()
 
-# === Start Scraping ===
-print("🚀 Starting Rizkalla Scraper")
-data_by_category = {}
+            price_container = card.find_element(By.CSS_SELECTOR, "footer div.product-price")
 
-for category, url in category_links:
+            try:
+                new_price_el = price_container.find_element(By.CSS_SELECTOR, "div.price-sale")
+                new_price = normalize_price(new_price_el.text)
+            except:
+                new_price = None
+
+            try:
+                old_price_el = price_container.find_element(By.CSS_SELECTOR, "del.price-compare")
+                old_price = normalize_price(old_price_el.text)
+            except:
+                old_price = None
+
+            page_data.append(make_row(title, old_price, new_price, product_url))
+        except Exception as e:
+            print(f"⚠️ Skipped product: {e}")
+            continue
+    return page_data
+
+def parse_loaded_page(driver, page, search_mode, page_snapshots):
+    """Parses a loaded result page with the --extract method; snapshot pages are queued and give their rows later."""
+    if args.extract == "snapshot":
+        page_snapshots.append(snapshots.submit(driver, search_mode=search_mode))
+        print(f"📸 Queued page {page} for parsing.")
+        return []
+    if args.extract == "structured":
+        return parse_cards_structured(driver)
+    if args.extract == "js":
+        page_data = parse_cards_js(driver)
+        print(f"✅ Parsed {len(page_data)} product cards on page {page} in one script call.")
+        return page_data
+    return parse_cards_dom(driver, page)
+
+def load_and_wait(driver, url):
+    """driver.get() that waits for the new document itself, as pageLoadStrategy "none" returns straight away."""
+    driver.execute_script("window.__previousPage = true;")
+    driver.get(url)
+    WebDriverWait(driver, args.category_timeout or 60).until(lambda d: d.execute_script(
+        "return !window.__previousPage && document.readyState === 'complete';"
+    ))
+
+def wait_for_tab_page(driver, grid_selector):
+    """
+    Wait until a tab's document has finished loading and its card count has stopped
+    changing; with pageLoadStrategy "none" the grid container shows up before its cards.
+    """
+    counts = []
+
+    def settled(d):
+        state = d.execute_script("return document.readyState;")
+        if state == "loading" or not d.find_elements(By.CSS_SELECTOR, grid_selector):
+            return False
+        counts.append(len(d.find_elements(By.CSS_SELECTOR, get_card_selector(d))))
+        return state == "complete" and len(counts) >= 2 and counts[-1] == counts[-2]
+
+    WebDriverWait(driver, args.category_timeout or 60, poll_frequency=0.5).until(settled)
+
+# === Scrape One Category ===
+def scrape_category(driver, wait, category, url):
+    """Walks every page of one category and returns its rows (empty list on failure)."""
     print(f"\n➡️ Scraping Category: {category}")
     print(f"🔗 URL: {url}")
-    driver.get(url)
+    if args.tabs > 1:
+        load_and_wait(driver, url)
+    else:
+        driver.get(url)
     time.sleep(3)
 
     search_mode = is_search_page(driver)
@@ -175,13 +308,26 @@ for category, url in category_links:
     total_count = get_total_product_count(driver)
     if not total_count:
         print("❌ Could not determine total product count. Skipping category.")
-        continue
+        return []
     print(f"📊 Total products: {total_count}")
     total_pages = (total_count // products_per_page) + (1 if total_count % products_per_page > 0 else 0)
     print(f" totalPages: {total_pages} ({products_per_page} per page)")
 
+    # Reuse the last run's rows if the count and first page are unchanged
+    fingerprint = listing_fingerprint(total_count, parse_cards_js(driver))
+    previous = fingerprints.previous_rows(category, fingerprint, total_count)
+    if previous is not None:
+        print(f"♻️ Listing unchanged since the last run, reusing its {len(previous)} products")
+        return previous
+
+    if args.tabs > 1:
+        return scrape_pages_in_tabs(driver, category, url, search_mode, total_pages)
+
     all_data = []
+    page_snapshots = []
     for page in range(1, total_pages + 1):
+        if page > 1 and deadline_expired():
+            break
         print(f"\n📄 Scraping Page {page} of {total_pages}...")
 
         try:
@@ -191,47 +337,12 @@ for category, url in category_links:
                 wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div#main-collection-product-grid")))
         except TimeoutException:
             print("❌ Timeout: Product grid not found.")
+            mark_incomplete()
             break
+        # Keep the loaded page for offline re-parsing (--archive)
+        archive.store_page(category, driver, page, search_mode=search_mode)
 
-        product_cards = get_product_cards(driver)
-        print(f"✅ Found {len(product_cards)} product cards on page {page}.")
-
-        page_data = []
-        for card in product_cards:
-            try:
-                title_el = card.find_element(By.CSS_SELECTOR, "section > header > div.product-card_vendor-title > h3 > a")
-                title = title_el.text.strip()
-                product_url = title_el.get_attribute("href").strip()
-
-                price_container = card.find_element(By.CSS_SELECTOR, "footer div.product-price")
-
-                try:
-                    new_price_el = price_container.find_element(By.CSS_SELECTOR, "div.price-sale")
-                    new_price = normalize_price(new_price_el.text)
-                except:
-                    new_price = None
-
-                try:
-                    old_price_el = price_container.find_element(By.CSS_SELECTOR, "del.price-compare")
-                    old_price = normalize_price(old_price_el.text)
-                except:
-                    old_price = None
-
-                product_code = extract_sku(title)
-                normalized_code = normalize_sku(product_code)
-
-                page_data.append({
-                    "Item Name": title,
-                    "Old Price": old_price,
-                    "New Price": new_price,
-                    "Product Code": product_code,
-                    "Normalized Code": normalized_code,
-                    "Product URL": product_url
-                })
-            except Exception as e:
-                print(f"⚠️ Skipped product: {e}")
-                continue
-
+        page_data = parse_loaded_page(driver, page, search_mode, page_snapshots)
         all_data.extend(page_data)
 
         # === Pagination: Click "Next" or numbered link ===
@@ -269,37 +380,171 @@ for category, url in category_links:
                     continue
             except:
                 print(f"⚠️ Could not navigate to page {next_page_num}")
+                mark_incomplete()
                 break
 
         print("🔚 Last page reached.")
         break
 
-    # Save data for this category
-    if all_data:
-        data_by_category[category] = all_data
-        print(f"📌 Collected {len(all_data)} products for '{category}'")
+    if snapshots:
+        return snapshots.rows(page_snapshots, rows_from_cards)
+    return all_data
+
+# === Multi-Tab Pagination ===
+def scrape_pages_in_tabs(driver, category, url, search_mode, total_pages):
+    """Parse page 1 in this tab, then open ?page=N in batches of --tabs tabs and parse each once its grid is there."""
+    grid_selector = ".search-results_inner" if search_mode else "div#main-collection-product-grid"
+    main_window = driver.current_window_handle
+    page_snapshots = []
+    archive.store_page(category, driver, 1, search_mode=search_mode)
+    all_data = parse_loaded_page(driver, 1, search_mode, page_snapshots)
+
+    pages = list(range(2, total_pages + 1))
+    for start in range(0, len(pages), args.tabs):
+        if deadline_expired():
+            break
+        # Start every navigation of the batch first; with pageLoadStrategy "none" (set for
+        # --tabs) chromedriver doesn't wait for one tab's load before the next command
+        tabs = []
+        for page in pages[start:start + args.tabs]:
+            driver.switch_to.new_window("tab")
+            configure_tab(driver)
+            driver.execute_script("window.location.href = arguments[0];", with_query(url, page=page))
+            tabs.append((page, driver.current_window_handle))
+        print(f"📑 Loading pages {tabs[0][0]}-{tabs[-1][0]} of {total_pages} in {len(tabs)} tabs...")
+
+        for page, handle in tabs:
+            driver.switch_to.window(handle)
+            try:
+                wait_for_tab_page(driver, grid_selector)
+                archive.store_page(category, driver, page, search_mode=search_mode)
+                all_data.extend(parse_loaded_page(driver, page, search_mode, page_snapshots))
+            except TimeoutException:
+                print(f"⚠️ Page {page} did not load in its tab.")
+                mark_incomplete()
+            finally:
+                driver.close()
+        driver.switch_to.window(main_window)
+
+    if snapshots:
+        return snapshots.rows(page_snapshots, rows_from_cards)
+    return all_data
+
+# === Scrape One Category Over HTTP ===
+def scrape_category_http(session, category, url):
+    """Downloads page 1 for the count, then every other ?page=N concurrently; returns rows in page order."""
+    print(f"\n➡️ Scraping Category: {category}")
+    print(f"🔗 URL: {url}")
+    search_mode = is_search_url(url)
+    products_per_page = 16 if search_mode else 20
+
+    try:
+        html = fetch_html(session, url)
+    except Exception as e:
+        print(f"❌ Could not download first page: {e}")
+        return []
+    first_page = parse_document(html)
+
+    total_count = rizkalla_total_count(first_page)
+    if not total_count:
+        print("❌ Could not determine total product count. Skipping category.")
+        return []
+    total_pages = (total_count // products_per_page) + (1 if total_count % products_per_page > 0 else 0)
+    print(f"📊 Total products: {total_count} | {total_pages} pages ({products_per_page} per page)")
+
+    all_data = rows_from_cards(rizkalla_cards(first_page, url, search_mode))
+    print(f"✅ Parsed {len(all_data)} product cards on page 1.")
+    fingerprint = listing_fingerprint(total_count, all_data)
+    previous = fingerprints.previous_rows(category, fingerprint, total_count)
+    if previous is not None:
+        print(f"♻️ Listing unchanged since the last run, reusing its {len(previous)} products")
+        return previous
+    archive.store(category, 1, html, url, search_mode=search_mode)
+    offers = structured_offers(first_page, url) if args.extract == "structured" else {}
+    page_urls = [with_query(url, page=page) for page in range(2, total_pages + 1)]
+    for page, (page_url, html, error) in enumerate(fetch_all(session, page_urls, args.http_workers), start=2):
+        if html is None:
+            print(f"⚠️ Could not download page {page}: {error}")
+            mark_incomplete()
+            continue
+        archive.store(category, page, html, page_url, search_mode=search_mode)
+        doc = parse_document(html)
+        page_data = rows_from_cards(rizkalla_cards(doc, page_url, search_mode))
+        if not page_data:
+            report_empty_page(page_url)
+        print(f"✅ Parsed {len(page_data)} product cards on page {page}.")
+        all_data.extend(page_data)
+        if args.extract == "structured":
+            offers.update(structured_offers(doc, page_url))
+    if args.extract == "structured":
+        found = apply_structured(all_data, offers, normalize_sku)
+        print(f"✅ {found} of {len(all_data)} products priced from embedded data.")
+    return all_data
+
+# === Save One Category ===
+def save_category(category, data, partial):
+    """Checkpoints one category's rows and reports the count."""
+    if data:
+        checkpoint.save(category, data, partial=partial)
+        if not partial:
+            fingerprints.record(category, len(data))
+        saved_categories.append(category)
+        print(f"📌 Collected {len(data)} products for '{category}'{' (partial)' if partial else ''}")
     else:
         print(f"⚠️ No products collected for '{category}'")
 
+# === Start Scraping ===
+print("🚀 Starting Rizkalla Scraper")
+saved_categories = []  # rows live in the checkpoint files, not in memory
+pending = deque()  # (category, rows or PendingRows, partial) not saved yet
+recycler = DriverRecycler(create_driver, args.recycle_every, args.max_heap_mb, args.max_browser_mb)
+
+for category, url in category_links:
+    if checkpoint.has(category):
+        save_in_order(pending, save_category, flush=True)  # keep the sheet order of the targets file
+        saved_categories.append(category)
+        print(f"⏭️ Resumed {checkpoint.count(category)} products for '{category}' from checkpoint")
+        continue
+
+    deadline = start_category_deadline(args.category_timeout)
+    if args.fetch == "http":
+        all_data = scrape_category_http(session, category, url)
+    else:
+        try:
+            with polite_request(url, kind="browser", timed=False) as slot:
+                all_data = scrape_with_blocking(
+                    driver, "rizkalla", args, lambda: scrape_category(driver, wait, category, url)
+                )
+                if not all_data:
+                    slot.fail()
+        except TimeoutException:
+            print(f"⏱️ Page load for '{category}' timed out. Moving on.")
+            all_data = []
+
+    # Save data for this category (with --extract snapshot, once its pages are parsed)
+    pending.append((category, all_data, deadline.partial))
+    save_in_order(pending, save_category)
+
+    # Fresh Chrome once the category count or memory limits are reached
+    if driver:
+        driver = recycler.check(driver)
+        wait = WebDriverWait(driver, 10)
+
+# Wait for categories whose snapshots are still being parsed
+save_in_order(pending, save_category, flush=True)
+if snapshots:
+    snapshots.shutdown()
+
 # === Save All Data to Single Workbook ===
-if data_by_category:
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        for category, data in data_by_category.items():
-            safe_sheet_name = re.sub(r'[^\w\s-]', '_', category)[:31].strip()
-            df_out = pd.DataFrame(data)[[
-                "Item Name",
-                "Old Price",
-                "New Price",
-                "Product Code",
-                "Normalized Code",
-                "Product URL"
-            ]]
-            df_out.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-            style_sheet(writer.sheets[safe_sheet_name], category, datetime.now().strftime("%y-%m-%d"))
+if saved_categories:
+    # Clean sheet names (remove invalid chars, limit to 31)
+    sheets = [(category, sheet_name(category)) for category in saved_categories]
+    write_workbook(output_file, sheets, checkpoint, SHEET_STYLE, datetime.now().strftime("%y-%m-%d"))
     print(f"📁 Saved all categories to: {output_file}")
 else:
     print("⚠️ No data collected across all categories.")
 
 # === Cleanup ===
-driver.quit()
+if driver:
+    release_driver(driver)
 print("🏁 Rizkalla scraping completed.")
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = os.path.join(SCRIPT_DIR, "logs")
+sys.path.insert(0, SCRIPT_DIR)
+from common.cli import parse_worker_overrides
+
+# === Retailer Registry ===
+# "workers" is the per-retailer concurrency limit (Chrome drivers inside that scraper).
+# None means the scraper does not take a --workers option and always runs one driver.
+RETAILERS = {
+    "2b": {"dir": "2b", "script": "2b-scraper.py", "workers": None},
+    "btech": {"dir": "btech", "script": "btech-scraper.py", "workers": 3},
+    "raneen": {"dir": "raneen", "script": "raneen-scraper.py", "workers": None},
+    "raya": {"dir": "raya", "script": "raya-scraper.py", "workers": None},
+    "rizkalla": {"dir": "rizkalla", "script": "rizkalla-scraper.py", "workers": None},
+}
+
+def log(msg):
+    print(f"[RUN] {msg}")
+
+def build_command(name, workers, extra_args):
+    """Command line for one retailer scraper, run from its own folder."""
+    config = RETAILERS[name]
+    command = [sys.executable, config["script"]]
+    if config["workers"] is not None and workers:
+        command += ["--workers", str(workers)]
+    return command + extra_args
+
+def run_retailer(name, command, log_path):
+    """Run one scraper as a child process, streaming its output to a log file."""
+    cwd = os.path.join(SCRIPT_DIR, RETAILERS[name]["dir"])
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+    started = time.monotonic()
+    with open(log_path, "w", encoding="utf-8") as log_file:
+        try:
+            result = subprocess.run(command, cwd=cwd, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+            returncode = result.returncode
+        except OSError as e:
+            log_file.write(f"❌ Could not start scraper: {e}\n")
+            returncode = -1
+    return name, returncode, time.monotonic() - started
+
+# === Main ===
+parser = argparse.ArgumentParser(description="Run all retailer scrapers concurrently")
+parser.add_argument("--only", nargs="+", choices=sorted(RETAILERS), help="Run only these retailers")
+parser.add_argument("--max-parallel", type=int, default=len(RETAILERS),
+                    help="Maximum number of retailer processes running at once (default: all)")
+parser.add_argument("--workers", nargs="+", metavar="RETAILER=N",
+                    help="Override the per-retailer driver limit, e.g. --workers btech=4")
+args, extra_args = parser.parse_known_args()
+
+selected = args.only or list(RETAILERS)
+worker_limits = {name: RETAILERS[name]["workers"] for name in selected}
+# Only scrapers that take --workers can use an override; the rest always run one driver
+worker_limits.update(parse_worker_overrides(
+    args.workers, {name for name, config in RETAILERS.items() if config["workers"] is not None}))
+
+os.makedirs(LOG_DIR, exist_ok=True)
+timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+
+log(f"🚀 Starting {len(selected)} scrapers ({max(1, args.max_parallel)} at a time)")
+run_started = time.monotonic()
+results = {}
+with ThreadPoolExecutor(max_workers=max(1, args.max_parallel)) as pool:
+    futures = []
+    for name in selected:
+        command = build_command(name, worker_limits.get(name), extra_args)
+        log_path = os.path.join(LOG_DIR, f"{name}_{timestamp}.log")
+        log(f"➡️ {name}: {' '.join(command[1:])} (log: {log_path})")
+        futures.append(pool.submit(run_retailer, name, command, log_path))
+    for future in as_completed(futures):
+        name, returncode, elapsed = future.result()
+        results[name] = (returncode, elapsed)
+        status = "✅" if returncode == 0 else "❌"
+        log(f"{status} {name} finished with exit code {returncode} in {elapsed / 60:.1f} min")
+
+# === Summary ===
+failed = [name for name, (returncode, _) in results.items() if returncode != 0]
+log(f"🏁 All scrapers finished in {(time.monotonic() - run_started) / 60:.1f} min")
+for name in selected:
+    returncode, elapsed = results[name]
+    log(f"  - {name}: {'ok' if returncode == 0 else f'failed ({returncode})'} ({elapsed / 60:.1f} min)")
+if failed:
+    log(f"❌ Failed retailers: {', '.join(failed)}")
+sys.exit(1 if failed else 0)
@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from common.sitemap import fetchable_url, url_key
+from common.scraper_helpers import load_scraper_helpers
+
+RAYA = load_scraper_helpers("raya")[0]
+# Built by the scraper's own make_row, with the Product URL format of its card rows
+RAYA_ROW = RAYA["make_row"](
+    "غلاية كينوود KA-8030", None, 1299,
+    "https://www.rayashop.comhttps://www.rayashop.com/ar/kenwood-kettle-ka-8030",
+)
+
+def test_raya_row_code_is_normalized():
+    assert RAYA_ROW["Normalized Code"] == RAYA["normalize_sku"]("KA-8030")
+
+def test_doubled_raya_prefix_is_fetched_from_the_shop_host():
+    assert fetchable_url(RAYA_ROW["Product URL"]) == "https://www.rayashop.com/ar/kenwood-kettle-ka-8030"
+
+def test_doubled_prefix_keeps_the_same_url_key():
+    assert url_key(RAYA_ROW["Product URL"]) == url_key(fetchable_url(RAYA_ROW["Product URL"]))
+
+def test_plain_urls_are_unchanged():
+    url = "https://www.rizkalla.com/products/tv?ref=https://example.com/"
+    assert fetchable_url(url) == url
+
+def test_url_key_keeps_products_with_urls_in_their_query_apart():
+    tv = url_key("https://www.rizkalla.com/products/tv?ref=https://example.com/")
+    radio = url_key("https://www.rizkalla.com/products/radio?ref=https://example.com/")
+    assert tv == "/products/tv?ref=https://example.com/"
+    assert tv != radio
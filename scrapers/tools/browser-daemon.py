@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import shutil
+import signal
+import argparse
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, "..")))
+from common.browser import DAEMON_DIR, load_daemon_state, save_daemon_state, is_browser_alive
+from common.locks import try_lock, release_lock
+from common.cli import parse_worker_overrides
+
+# === Warm Browser Settings ===
+# Same window and anti-automation flags the scrapers pass to webdriver.Chrome
+BASE_FLAGS = ["--window-size=1920,1080", "--disable-gpu", "--no-first-run", "--no-default-browser-check"]
+RETAILER_BROWSERS = {
+    "2b": {"workers": 1, "flags": [
+        "--disable-dev-shm-usage",
+        "--disable-blink-features=AutomationControlled",
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
+    ]},
+    "btech": {"workers": 3, "flags": ["--disable-blink-features=AutomationControlled"]},
+    "raneen": {"workers": 1, "flags": []},
+    "raya": {"workers": 1, "flags": ["--disable-blink-features=AutomationControlled"]},
+    "rizkalla": {"workers": 1, "flags": ["--disable-blink-features=AutomationControlled"]},
+}
+BASE_PORT = 9300
+CHROME_CANDIDATES = [
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+def log(msg):
+    print(f"[DAEMON] {msg}")
+
+def find_chrome(explicit=None):
+    if explicit:
+        return explicit
+    for name in ("google-chrome", "google-chrome-stable", "chrome", "chromium", "chromium-browser"):
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in CHROME_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    raise SystemExit("❌ Chrome not found; pass --chrome PATH")
+
+def launch_browser(chrome, port, profile_dir, flags, headless):
+    command = [chrome, f"--remote-debugging-port={port}", f"--user-data-dir={profile_dir}"] + BASE_FLAGS + flags
+    if headless:
+        command.append("--headless=new")
+    command.append("about:blank")
+    kwargs = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(command, **kwargs)
+
+def stop_process(pid):
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], capture_output=True)
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except OSError:
+        pass
+
+def free_profile_dir(retailer, slots):
+    """Lowest-numbered profile of this retailer that no live slot is using (Chrome locks its profile)."""
+    in_use = {slot["profile"] for slot in slots}
+    number = 1
+    while os.path.join(DAEMON_DIR, "profiles", f"{retailer}-{number}") in in_use:
+        number += 1
+    return os.path.join(DAEMON_DIR, "profiles", f"{retailer}-{number}")
+
+def slot_lock_path(retailer, port):
+    return os.path.join(DAEMON_DIR, "locks", f"{retailer}-{port}.lock")
+
+# === Commands ===
+def start(args):
+    state = load_daemon_state()
+    overrides = parse_worker_overrides(args.workers, RETAILER_BROWSERS)
+    chrome = find_chrome(args.chrome)
+    port = BASE_PORT
+    for retailer in args.retailers or list(RETAILER_BROWSERS):
+        config = RETAILER_BROWSERS[retailer]
+        workers = overrides.get(retailer, config["workers"])
+        slots = [slot for slot in state.get(retailer, []) if is_browser_alive(slot["address"])]
+        used_ports = {slot["port"] for slots_ in state.values() for slot in slots_}
+        while len(slots) < workers:
+            while port in used_ports:
+                port += 1
+            profile_dir = free_profile_dir(retailer, slots)
+            process = launch_browser(chrome, port, profile_dir, config["flags"], args.headless)
+            address = f"127.0.0.1:{port}"
+            deadline = time.monotonic() + 20
+            while not is_browser_alive(address) and time.monotonic() < deadline:
+                time.sleep(0.5)
+            if not is_browser_alive(address):
+                log(f"❌ {retailer}: Chrome on port {port} did not come up")
+                stop_process(process.pid)
+                break
+            slots.append({"port": port, "address": address, "pid": process.pid, "profile": profile_dir})
+            used_ports.add(port)
+            log(f"✅ {retailer}: warm browser on {address}")
+        state[retailer] = slots
+    save_daemon_state(state)
+    log("🏁 Warm browsers ready. Run scrapers with --attach to use them.")
+
+def stop(args):
+    state = load_daemon_state()
+    for retailer in args.retailers or list(state):
+        for slot in state.pop(retailer, []):
+            stop_process(slot["pid"])
+            log(f"🛑 {retailer}: stopped {slot['address']}")
+    save_daemon_state(state)
+
+def status(args):
+    state = load_daemon_state()
+    if not state:
+        log("No warm browsers registered.")
+    for retailer, slots in state.items():
+        for slot in slots:
+            alive = is_browser_alive(slot["address"])
+            lock = try_lock(slot_lock_path(retailer, slot["port"]))
+            in_use = lock is None
+            release_lock(lock)
+            log(f"{retailer}: {slot['address']} {'up' if alive else 'DOWN'}{' (in use)' if in_use else ''}")
+
+# === Main ===
+parser = argparse.ArgumentParser(description="Keep warm Chrome instances running for the scrapers to attach to")
+parser.add_argument("command", choices=["start", "stop", "status"])
+parser.add_argument("--retailers", nargs="+", choices=sorted(RETAILER_BROWSERS))
+parser.add_argument("--workers", nargs="+", metavar="RETAILER=N", help="Browsers per retailer, e.g. btech=3")
+parser.add_argument("--chrome", help="Path to the Chrome binary")
+parser.add_argument("--headless", action="store_true")
+args = parser.parse_args()
+{"start": start, "stop": stop, "status": status}[args.command](args)
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import argparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, "..")))
+from common.locks import try_lock, release_lock
+from common.profiles import PROFILES_DIR, list_profiles, directory_size, last_used, lock_path, clean_profile
+
+def log(msg):
+    print(f"[PROFILES] {msg}")
+
+# === Commands ===
+def status(args):
+    profiles = list_profiles()
+    if not profiles:
+        log(f"No persistent profiles in {PROFILES_DIR}")
+    for name, path in profiles:
+        lock = try_lock(lock_path(path))
+        in_use = lock is None
+        release_lock(lock)
+        idle_days = (time.time() - last_used(path)) / 86400
+        log(f"{name}: {directory_size(path) / 1024 / 1024:.0f} MB, last used {idle_days:.1f} days ago{' (in use)' if in_use else ''}")
+
+def clean(args):
+    freed = sum(
+        clean_profile(path, args.older_than, args.max_mb, log=log)
+        for name, path in list_profiles()
+        if not args.retailers or name.rsplit("-", 1)[0] in args.retailers
+    )
+    log(f"🏁 Freed {freed / 1024 / 1024:.0f} MB")
+
+# === Main ===
+parser = argparse.ArgumentParser(description="List and clean up the scrapers' persistent Chrome profiles")
+parser.add_argument("command", choices=["status", "clean"])
+parser.add_argument("--retailers", nargs="+", help="Only clean these retailers' profiles")
+parser.add_argument("--older-than", type=float, default=14,
+                    help="Delete profiles unused for this many days (default: 14)")
+parser.add_argument("--max-mb", type=float, default=1024,
+                    help="Empty the caches of profiles larger than this (default: 1024)")
+args = parser.parse_args()
+{"status": status, "clean": clean}[args.command](args)
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPERS_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+sys.path.insert(0, SCRAPERS_DIR)
+from common import html_parsers
+from common.archive import CARD_PARSERS, read_manifest, load_snapshot
+from common.snapshots import parse_pool
+from common.checkpoint import CategoryCheckpoint
+from common.workbook import write_workbook
+from common.scraper_helpers import load_scraper_helpers
+
+def log(msg):
+    print(f"[REPLAY] {msg}")
+
+_helpers = {}
+
+def replay_category(output_dir, retailer, entries):
+    """Rows of one category rebuilt from its archived pages, deduplicated by product URL (runs in a pool worker)."""
+    if retailer not in _helpers:
+        _helpers[retailer] = load_scraper_helpers(retailer)[0]
+    parse_cards = getattr(html_parsers, CARD_PARSERS[retailer])
+    cards = []
+    for entry in entries:
+        doc = html_parsers.parse_document(load_snapshot(output_dir, entry["sha256"]))
+        cards.extend(parse_cards(doc, entry["url"], **entry["options"]))
+    rows, seen_urls = [], set()
+    for row in _helpers[retailer]["rows_from_cards"](cards):
+        if row["Product URL"] in seen_urls:
+            continue
+        seen_urls.add(row["Product URL"])
+        rows.append(row)
+    return rows
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Re-run extraction over archived listing snapshots, without a browser")
+parser.add_argument("retailer", choices=sorted(CARD_PARSERS))
+parser.add_argument("--date", action="append",
+                    help="Run date to replay as YYYY-MM-DD; repeat for a backfill (default: today)")
+parser.add_argument("--workers", type=int, help="Parsing processes (default: CPU count)")
+args = parser.parse_args()
+
+output_dir = os.path.join(SCRAPERS_DIR, args.retailer, f"{args.retailer}-outputs")
+dates = args.date or [datetime.now().strftime("%Y-%m-%d")]
+helpers, style = load_scraper_helpers(args.retailer)
+
+# === Parse Every Category of Every Date in Parallel ===
+started = time.monotonic()
+pool = parse_pool(args.workers)
+jobs = []
+for date in dates:
+    try:
+        categories = read_manifest(output_dir, date)
+    except FileNotFoundError:
+        log(f"⚠️ No snapshots archived for {args.retailer} on {date}")
+        continue
+    futures = {category: pool.submit(replay_category, output_dir, args.retailer, entries)
+               for category, entries in categories.items()}
+    jobs.append((date, categories, futures))
+
+# === Write One Workbook per Date ===
+for date, categories, futures in jobs:
+    # Kept apart from the scraper's own checkpoints, which a replay must not touch
+    checkpoint = CategoryCheckpoint(os.path.join(output_dir, ".snapshots", "replay"), date)
+    # The scraper's own checkpoints of that date, read only for their partial markers
+    scraped_dir = os.path.join(output_dir, ".checkpoints", date)
+    scraped = CategoryCheckpoint(output_dir, date, resume=True) if os.path.isdir(scraped_dir) else None
+    saved_categories = []
+    for category, future in futures.items():
+        rows = future.result()
+        log(f"📌 {date} '{category}': {len(rows)} products from {len(categories[category])} pages")
+        if rows:
+            checkpoint.save(category, rows, partial=bool(scraped and scraped.is_partial(category)))
+            saved_categories.append(category)
+    if not saved_categories:
+        log(f"⚠️ No products in the snapshots of {date}")
+        continue
+    output_file = os.path.join(output_dir, f"{args.retailer}-all-categories_{date}-replay.xlsx")
+    sheets = [(category, helpers["sheet_name"](category)) for category in saved_categories]
+    write_workbook(output_file, sheets, checkpoint, style, datetime.strptime(date, "%Y-%m-%d").strftime("%y-%m-%d"))
+    log(f"📁 Saved {len(saved_categories)} categories to: {output_file}")
+
+pool.shutdown()
+log(f"🏁 Replayed {len(jobs)} date(s) in {time.monotonic() - started:.1f}s")
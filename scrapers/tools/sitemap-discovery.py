@@ -0,0 +1,138 @@
+import os
+import re
+import sys
+import gzip
+import argparse
+from datetime import datetime
+from collections import Counter
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPERS_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+sys.path.insert(0, SCRAPERS_DIR)
+from common.http_fetch import make_session
+from common.checkpoint import CategoryCheckpoint
+from common.sitemap import PRODUCT_RULES, sitemaps_from_robots, iter_sitemap, is_product, url_key
+
+UNASSIGNED = "Unassigned"
+
+def log(msg):
+    print(f"[SITEMAP] {msg}")
+
+# === Category Mapping ===
+def known_products(output_dir, categories):
+    """Product path -> category, from each category's most recent checkpoint."""
+    checkpoints_dir = os.path.join(output_dir, ".checkpoints")
+    dates = sorted(
+        (name for name in os.listdir(checkpoints_dir) if os.path.isdir(os.path.join(checkpoints_dir, name))),
+        reverse=True,
+    ) if os.path.isdir(checkpoints_dir) else []
+    stores = [CategoryCheckpoint(output_dir, date, resume=True) for date in dates]
+    known = {}
+    for category in categories:
+        store = next((store for store in stores if store.has(category)), None)
+        if store:
+            for row in store.rows(category):
+                known.setdefault(url_key(row["Product URL"]), category)
+    return known
+
+def category_prefixes(category_links):
+    """Listing paths without .html, longest first, for product URLs nested under their category."""
+    prefixes = [(re.sub(r"\.html$", "", url_key(url).split("?", 1)[0]), category) for category, url in category_links]
+    return sorted(prefixes, key=lambda prefix: len(prefix[0]), reverse=True)
+
+def category_of(key, known, prefixes):
+    if key in known:
+        return known[key]
+    for prefix, category in prefixes:
+        if prefix and key.startswith(prefix + "/"):
+            return category
+    return UNASSIGNED
+
+# === Run Listings ===
+# <output_dir>/.sitemaps/<date>.tsv.gz: one "path<TAB>category<TAB>url" line per product
+def save_listing(path, products):
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        for key, (category, loc) in products.items():
+            f.write(f"{key}\t{category}\t{loc}\n")
+    os.replace(temp_path, path)
+
+def load_listing(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return {key: (category, loc) for key, category, loc in (line.rstrip("\n").split("\t") for line in f if line.strip())}
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Find new and removed products from a retailer's sitemap, without a browser")
+parser.add_argument("retailer", choices=sorted(PRODUCT_RULES))
+parser.add_argument("--targets", help="Targets workbook to read instead of the scraper's default *-targets.xlsx")
+parser.add_argument("--sitemap", nargs="+", help="Sitemap or sitemap index URLs (default: the ones listed in robots.txt)")
+parser.add_argument("--product-pattern", help="Regex that marks product URLs, instead of the retailer's built-in rule")
+args = parser.parse_args()
+
+retailer_dir = os.path.join(SCRAPERS_DIR, args.retailer)
+df = pd.read_excel(args.targets or os.path.join(retailer_dir, f"{args.retailer}-targets.xlsx"), header=1)
+df.columns = df.columns.str.strip()
+df = df.dropna(subset=["Category", "URL"])
+category_links = list(zip(df["Category"], df["URL"]))
+
+output_dir = os.path.join(retailer_dir, f"{args.retailer}-outputs")
+state_dir = os.path.join(output_dir, ".sitemaps")
+os.makedirs(state_dir, exist_ok=True)
+timestamp = datetime.now().strftime("%Y-%m-%d")
+
+# === Stream the Sitemaps ===
+parts = urlsplit(category_links[0][1])
+session = make_session()
+sitemap_urls = args.sitemap or sitemaps_from_robots(session, f"{parts.scheme}://{parts.netloc}")
+rule = args.product_pattern or PRODUCT_RULES[args.retailer]
+known = known_products(output_dir, [category for category, url in category_links])
+prefixes = category_prefixes(category_links)
+
+products, failed = {}, []
+for sitemap_url in sitemap_urls:
+    for entry in iter_sitemap(session, sitemap_url, failed, log=log):
+        if is_product(entry, rule):
+            key = url_key(entry["loc"])
+            products[key] = (category_of(key, known, prefixes), entry["loc"])
+session.close()
+log(f"📦 {len(products)} products in the sitemap")
+
+# === Diff Against the Previous Run ===
+previous_files = sorted(
+    name for name in os.listdir(state_dir) if name.endswith(".tsv.gz") and name < f"{timestamp}.tsv.gz"
+)
+previous = load_listing(os.path.join(state_dir, previous_files[-1])) if previous_files else None
+if failed:
+    # An incomplete sitemap would report everything it missed as removed
+    log(f"⚠️ {len(failed)} sitemaps could not be read; removed products are not reported and this run is not kept")
+else:
+    save_listing(os.path.join(state_dir, f"{timestamp}.tsv.gz"), products)
+
+changes = []
+if previous is not None:
+    log(f"🔍 Comparing with {previous_files[-1][:-len('.tsv.gz')]}")
+    for key in products.keys() - previous.keys():
+        changes.append({"Category": products[key][0], "Change": "New", "Product URL": products[key][1]})
+    if not failed:
+        for key in previous.keys() - products.keys():
+            changes.append({"Category": previous[key][0], "Change": "Removed", "Product URL": previous[key][1]})
+else:
+    log("ℹ️ No earlier run to compare with; this one is the baseline")
+
+# === Summary ===
+totals = Counter(category for category, loc in products.values())
+counts = Counter((change["Category"], change["Change"]) for change in changes)
+for category in [category for category, url in category_links] + [UNASSIGNED]:
+    if totals[category] or counts[(category, "Removed")]:
+        log(f"📌 {category}: {totals[category]} products, +{counts[(category, 'New')]} / -{counts[(category, 'Removed')]}")
+
+if changes:
+    changes.sort(key=lambda change: (change["Category"], change["Change"], change["Product URL"]))
+    output_file = os.path.join(output_dir, f"{args.retailer}-sitemap-changes_{timestamp}.xlsx")
+    pd.DataFrame(changes, columns=["Category", "Change", "Product URL"]).to_excel(output_file, index=False)
+    log(f"📁 Saved {len(changes)} changes to: {output_file}")
+elif previous is not None:
+    log("✅ No catalog changes since the previous run")
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPERS_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, ".."))
+sys.path.insert(0, SCRAPERS_DIR)
+from common.http_fetch import make_session, fetch_all
+from common.checkpoint import CategoryCheckpoint
+from common.html_parsers import parse_document
+from common.structured import product_page_offer
+from common.sitemap import url_key, fetchable_url
+from common.scraper_helpers import load_scraper_helpers
+
+RETAILERS = ["2b", "btech", "raneen", "raya", "rizkalla"]
+# Shops whose product pages render their prices in the browser, out of reach of a plain GET
+CLIENT_RENDERED = {"raya"}
+DELTA_COLUMNS = ["Normalized Code", "Item Name", "Product URL", "Status",
+                 "Previous New Price", "New Price", "Previous Old Price", "Old Price"]
+
+def log(msg):
+    print(f"[PROBE] {msg}")
+
+# === Last Scrape ===
+def latest_rows(output_dir):
+    """
+    Rows of every category from its most recent complete checkpoint (partial ones are
+    skipped), so a partial, resumed or subset run doesn't hide older categories; and the
+    newest date used.
+    """
+    checkpoints_dir = os.path.join(output_dir, ".checkpoints")
+    if not os.path.isdir(checkpoints_dir):
+        return [], None
+    rows, seen, newest = [], set(), None
+    for date in sorted(os.listdir(checkpoints_dir), reverse=True):
+        if not os.path.isdir(os.path.join(checkpoints_dir, date)):
+            continue
+        store = CategoryCheckpoint(output_dir, date, resume=True)
+        for name in store.complete_files():
+            if name in seen:
+                continue
+            seen.add(name)
+            rows.extend(store.file_rows(name))
+            newest = newest or date
+    return rows, newest
+
+def read_watchlist(path):
+    """Normalized Codes and product URLs, one per line; blank lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+
+def resolve_watchlist(entries, rows, normalize_sku):
+    """{url_key: product} for every watched code or URL; a code matches every scraped URL with that code."""
+    by_code, by_url = {}, {}
+    for row in rows:
+        by_code.setdefault(row["Normalized Code"], []).append(row)
+        by_url[url_key(row["Product URL"])] = row
+    products, missing = {}, []
+    for entry in entries:
+        if "://" in entry:
+            row = by_url.get(url_key(entry), {"Product URL": entry})
+            products[url_key(entry)] = row
+        elif by_code.get(normalize_sku(entry)):
+            for row in by_code[normalize_sku(entry)]:
+                products[url_key(row["Product URL"])] = row
+        else:
+            missing.append(entry)
+    return products, missing
+
+# === Run Settings ===
+parser = argparse.ArgumentParser(description="Re-check the prices of a watchlist of products, without a full scrape")
+parser.add_argument("retailer", choices=RETAILERS)
+parser.add_argument("watchlist", help="Text file with one product code (as scraped or normalized) or product URL per line")
+parser.add_argument("--workers", type=int, default=4, help="Product pages fetched at once (default: 4)")
+args = parser.parse_args()
+
+output_dir = os.path.join(SCRAPERS_DIR, args.retailer, f"{args.retailer}-outputs")
+state_path = os.path.join(output_dir, ".probes", "state.json")
+os.makedirs(os.path.dirname(state_path), exist_ok=True)
+try:
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)  # url_key -> prices seen by the last probe
+except (OSError, ValueError):
+    state = {}
+
+rows, scrape_date = latest_rows(output_dir)
+normalize_sku = load_scraper_helpers(args.retailer)[0]["normalize_sku"]
+products, missing = resolve_watchlist(read_watchlist(args.watchlist), rows, normalize_sku)
+for entry in missing:
+    log(f"⚠️ '{entry}' is in no complete checkpoint (newest: {scrape_date or 'none found'}); add its product URL instead")
+log(f"🎯 Probing {len(products)} product pages, {args.workers} at a time")
+if args.retailer in CLIENT_RENDERED:
+    log(f"⚠️ {args.retailer} renders prices in the browser; most products will come back as 'No price found'. "
+        "Run the scraper for up-to-date prices")
+
+# === Probe the Product Pages ===
+session = make_session(pool_size=args.workers)
+urls = [fetchable_url(product["Product URL"]) for product in products.values()]
+results = fetch_all(session, urls, args.workers)
+session.close()
+
+changes, unchanged = [], 0
+checked_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+for (key, product), (url, html, error) in zip(products.items(), results):
+    # Compare with the last probe of this product, else with the last scrape
+    previous = state.get(key) or {"new": product.get("New Price"), "old": product.get("Old Price")}
+    offer = product_page_offer(parse_document(html), url) if html else None
+    change = {
+        "Normalized Code": product.get("Normalized Code"),
+        "Item Name": product.get("Item Name"),
+        "Product URL": url,
+        "Previous New Price": previous["new"],
+        "Previous Old Price": previous["old"],
+        "New Price": offer["new"] if offer else None,
+        "Old Price": offer["old"] if offer else None,
+    }
+    if html is None:
+        status = "Unavailable" if getattr(getattr(error, "response", None), "status_code", None) == 404 else "Error"
+        log(f"⚠️ {url}: {error}")
+    elif offer is None:
+        status = "No price found"
+    elif (offer["new"], offer["old"]) != (previous["new"], previous["old"]):
+        status = "Changed"
+    else:
+        unchanged += 1
+        state[key] = dict(previous, checked=checked_at)
+        continue
+    change["Status"] = status
+    changes.append(change)
+    if offer:
+        state[key] = {"new": offer["new"], "old": offer["old"], "checked": checked_at}
+
+with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+    json.dump(state, f, ensure_ascii=False, indent=2)
+os.replace(state_path + ".tmp", state_path)
+
+# === Delta File ===
+log(f"📊 {len(changes)} changed or failed, {unchanged} unchanged")
+if changes:
+    output_file = os.path.join(output_dir, f"{args.retailer}-watchlist-delta_{datetime.now().strftime('%Y-%m-%d_%H%M')}.xlsx")
+    pd.DataFrame(changes, columns=DELTA_COLUMNS).to_excel(output_file, index=False)
+    log(f"📁 Saved delta to: {output_file}")